@@ -1,89 +1,204 @@
+import os
 import unittest
+import orjson
+import pytest
 import requests
-
-
-class TestGithubApi(unittest.TestCase):
+import vcr
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# запись и воспроизведение ответов: первый прогон идёт в сеть,
+# следующие читают ответы с диска (токен в кассеты не попадает);
+# 'once' - при наличии кассеты запрос мимо неё падает, а не уходит в сеть
+github_vcr = vcr.VCR(
+    cassette_library_dir=os.path.join(os.path.dirname(__file__), 'fixtures'),
+    record_mode='once',
+    # тело тоже сравнивается: POST с другим именем репозитория
+    # не должен получить записанный ответ для чужого имени
+    match_on=['method', 'scheme', 'host', 'port', 'path', 'query', 'body'],
+    filter_headers=['authorization'],
+)
+
+
+# запросы без токена идут в отдельный лимит (60/час) и не делят квоту
+# с тестами под токеном; отдельный класс без авторизованного setUpClass
+# в своей группе xdist (--dist=loadgroup), чтобы не делить воркер
+# с авторизованной группой
+@pytest.mark.unauthenticated
+@pytest.mark.xdist_group('unauthenticated')
+class TestGithubUserApi(unittest.TestCase):
     BASE_URL = 'https://api.github.com'
-    TOKEN = 'Добавь свой токен'
-    TEST_REPO_NAME = 'Hello-World'
     USERNAME = 'davyd-vihara'
-
-    def setup(self):
-        # хэдеры для методов POST, PATCH, DELETE
-        self.headers = {
-            'Authorization': f'Bearer {self.TOKEN}',
-            'Accept': 'application/vnd.github+json'
-        }
-        # флаг — запускать teardown или нет
-        self.run_teardown = True
-
-    def teardown(self):
-        if self.run_teardown:
-            # удаление репозитория
-            url = (f'{self.BASE_URL}/repos/{self.USERNAME}/'
-                   f'{self.TEST_REPO_NAME}')
-            response = requests.delete(url, headers=self.headers)
-            assert response.status_code == 204
+    # ETag и тела ответов идемпотентных GET между запусками
+    ETAG_CACHE_PATH = os.path.join(
+        os.path.dirname(__file__), '.cache', 'github_etags.json'
+    )
+
+    _URL_USER = f'{BASE_URL}/users/{USERNAME}'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.session = requests.Session()
+        cls.session.headers['Accept'] = 'application/vnd.github+json'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.session.close()
+
+    def cached_get(self, url):
+        # условный GET: если ETag не изменился, GitHub отвечает 304 без тела,
+        # и такой ответ не расходует лимит запросов
+        try:
+            with open(self.ETAG_CACHE_PATH, 'rb') as f:
+                cache = orjson.loads(f.read())
+        except (OSError, ValueError):
+            cache = {}
+
+        entry = cache.get(url)
+        headers = {}
+        if entry:
+            headers['If-None-Match'] = entry['etag']
+        response = self.session.get(url, headers=headers)
+        if response.status_code == 304:
+            return 200, entry['body']
+
+        data = orjson.loads(response.content)
+        etag = response.headers.get('ETag')
+        if response.status_code == 200 and etag:
+            cache[url] = {'etag': etag, 'body': data}
+            os.makedirs(os.path.dirname(self.ETAG_CACHE_PATH), exist_ok=True)
+            with open(self.ETAG_CACHE_PATH, 'wb') as f:
+                f.write(orjson.dumps(cache))
+        return response.status_code, data
 
     def test_get_user(self):
-        self.setup()
-        # в этом тесте ничего не создаётся, поэтому teardown не нужен
-        self.run_teardown = False
+        status_code, data = self.cached_get(self._URL_USER)
 
-        url = f'{self.BASE_URL}/users/{self.USERNAME}'
-        response = requests.get(url)
+        assert status_code == 200
+        assert data['login'] == self.USERNAME
 
-        assert response.status_code == 200
 
-        data = response.json()
-        assert data['login'] == self.USERNAME
+# авторизованные тесты - одна группа на одном воркере: общий
+# репозиторий класса (fixture_repo) создаётся один раз за прогон
+@pytest.mark.xdist_group('authenticated')
+class TestGithubApi(unittest.TestCase):
+    BASE_URL = 'https://api.github.com'
+    TOKEN = 'Добавь свой токен'
+    USERNAME = 'davyd-vihara'
+    # имена записаны в кассетах, поэтому постоянные и не зависят
+    # от воркера xdist: TEST_REPO_NAME создаёт только test_create_repo,
+    # FIXTURE_REPO_NAME - общий репозиторий класса (fixture_repo)
+    TEST_REPO_NAME = 'Hello-World'
+    FIXTURE_REPO_NAME = f'{TEST_REPO_NAME}-fixture'
+
+    # URL и тела запросов не меняются между тестами — собираем их один раз
+    # при загрузке класса (словари только читаются, не изменять)
+    _URL_REPOS = f'{BASE_URL}/user/repos'
+    _URL_REPO = f'{BASE_URL}/repos/{USERNAME}/{TEST_REPO_NAME}'
+    _BODY_CREATE = {
+        "name": TEST_REPO_NAME,
+        "description": "Тестовое описание",
+        "private": False,
+        "is_template": True
+    }
+    _BODY_UPDATE = {
+        "description": "Новое описание"
+    }
+    # тела сериализуются в JSON тоже один раз и уходят как data=
+    _BODY_CREATE_BYTES = orjson.dumps(_BODY_CREATE)
+    _BODY_UPDATE_BYTES = orjson.dumps(_BODY_UPDATE)
+    # Content-Type только для запросов с JSON-телом (POST/PATCH)
+    _JSON_HEADERS = {'Content-Type': 'application/json'}
+
+    @classmethod
+    def setUpClass(cls):
+        # одна сессия на весь класс: TLS-соединение с api.github.com
+        # переиспользуется всеми тестами вместо нового на каждый запрос
+        cls.session = requests.Session()
+        # хэдеры задаются один раз на сессию, а не передаются в каждый вызов
+        cls.session.headers.update({
+            'Authorization': f'Bearer {cls.TOKEN}',
+            'Accept': 'application/vnd.github+json'
+        })
+        # временные 5xx и лимиты повторяем внутри того же соединения,
+        # а не перезапуском всего теста; POST не повторяем, чтобы
+        # не создать репозиторий дважды
+        retry = Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=frozenset(['GET', 'PATCH', 'DELETE']),
+            respect_retry_after_header=True
+        )
+        cls.session.mount('https://', HTTPAdapter(
+            max_retries=retry, pool_connections=4, pool_maxsize=10
+        ))
+        # общий репозиторий создаётся при первом запросе (fixture_repo)
+        cls._fixture_repo_url = None
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            if cls._fixture_repo_url is not None:
+                with github_vcr.use_cassette('fixture_repo_delete.yaml'):
+                    response = cls.session.delete(cls._fixture_repo_url)
+                assert response.status_code == 204
+        finally:
+            cls.session.close()
+
+    def use_cassette(self, name):
+        # enterContext закрывает кассету в cleanup последней, поэтому
+        # удаление репозитория из addCleanup тоже попадает в запись
+        self.enterContext(github_vcr.use_cassette(name))
+
+    def _delete_repo(self, url):
+        # удаление репозитория, созданного в тесте
+        response = self.session.delete(url)
+        assert response.status_code == 204
+
+    @classmethod
+    def fixture_repo(cls):
+        # уже существующий репозиторий для тестов, которым он нужен:
+        # создаётся один раз на класс при первом обращении и удаляется
+        # в tearDownClass, а не create+delete в каждом тесте; воркеры,
+        # которым такие тесты не достались, его не создают
+        if cls._fixture_repo_url is None:
+            name = cls.FIXTURE_REPO_NAME
+            body = orjson.dumps({**cls._BODY_CREATE, "name": name})
+            with github_vcr.use_cassette('fixture_repo_create.yaml'):
+                response = cls.session.post(
+                    cls._URL_REPOS, data=body, headers=cls._JSON_HEADERS
+                )
+            assert response.status_code == 201
+            cls._fixture_repo_url = f'{cls.BASE_URL}/repos/{cls.USERNAME}/{name}'
+        return cls._fixture_repo_url
 
     def test_create_repo(self):
-        self.setup()
+        self.use_cassette('test_create_repo.yaml')
 
-        url = f'{self.BASE_URL}/user/repos'
-        body = {
-            "name": self.TEST_REPO_NAME,
-            "description": "Тестовое описание",
-            "private": False,
-            "is_template": True
-        }
-        response = requests.post(url, headers=self.headers, json=body)
+        response = self.session.post(
+            self._URL_REPOS, data=self._BODY_CREATE_BYTES,
+            headers=self._JSON_HEADERS
+        )
 
         assert response.status_code == 201
+        self.addCleanup(self._delete_repo, self._URL_REPO)
 
-        data = response.json()
+        data = orjson.loads(response.content)
         assert data['name'] == self.TEST_REPO_NAME
 
-        self.teardown()
-
     def test_update_repo(self):
-        self.setup()
-
-        # создание репозитория (без ассёртов)
-        url_create = f'{self.BASE_URL}/user/repos'
-        body_create = {
-            "name": self.TEST_REPO_NAME,
-            "description": "Тестовое описание",
-            "private": False,
-            "is_template": True
-        }
-        requests.post(url_create, headers=self.headers, json=body_create)
-
-        # обновление репозитория
-        new_description = "Новое описание"
-        url_update = (f'{self.BASE_URL}/repos/{self.USERNAME}/'
-                      f'{self.TEST_REPO_NAME}')
-        body_update = {
-            "description": new_description
-        }
-        response = requests.patch(
-            url_update, headers=self.headers, json=body_update
+        # обновление общего репозитория класса; репозиторий создаётся
+        # до кассеты теста, у его создания своя кассета
+        repo_url = self.fixture_repo()
+        self.use_cassette('test_update_repo.yaml')
+
+        response = self.session.patch(
+            repo_url, data=self._BODY_UPDATE_BYTES,
+            headers=self._JSON_HEADERS
         )
 
         assert response.status_code == 200
 
-        data = response.json()
-        assert data['description'] == new_description
-
-        self.teardown()
+        data = orjson.loads(response.content)
+        assert data['description'] == self._BODY_UPDATE['description']
@@ -1,16 +1,32 @@
 import pdfplumber
-from collections import defaultdict
+from pdfplumber.display import PageImage
+import fitz
+import numpy as np
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
 from dataclasses import dataclass, asdict
 from typing import List, Tuple, Optional, Dict, Any
 import colorsys
 import os
 from datetime import datetime
 import argparse
+import hashlib
+import heapq
 import json
+import pickle
 import re
+import sys
 
+try:
+    import orjson  # Необязательно: ускоряет JSON-отчет, без него используется json
+except ImportError:
+    orjson = None
 
-@dataclass
+
+@dataclass(slots=True)
 class AccessibilityIssue:
     """Класс для хранения информации о проблемах доступности"""
     page: int
@@ -24,6 +40,41 @@ class AccessibilityIssue:
     font_size: float = 0.0
     color: Tuple[float, float, float] = (0, 0, 0)  # RGB
     background_color: Tuple[float, float, float] = (1, 1, 1)  # RGB
+    normalized_text: str = ""  # Текст для группировки, заполняется в analyze()
+
+
+# Фабрики пустых групп для defaultdict в методах группировки отчетов
+def _new_text_page_group() -> Dict[str, Any]:
+    """Группа group_issues_by_text_and_page"""
+    return {
+        'pages': defaultdict(list),
+        'total_count': 0,
+        'first_issue': None,
+        'issue_types': set()
+    }
+
+
+def _new_pattern_group() -> Dict[str, Any]:
+    """Группа group_issues_by_text_pattern"""
+    return {
+        'pages': set(),
+        'issues': [],
+        'total_words': 0,
+        'issue_types': set(),
+        'severities': defaultdict(int),
+        'description': "",  # В отчет идет одно описание - первое
+        'font_info': set()
+    }
+
+
+def _new_color_text_group() -> Dict[str, Any]:
+    """Группа (цвет, текст) в generate_color_report_improved"""
+    return {
+        'pages': defaultdict(int),
+        'total_count': 0,
+        'issues': [],
+        'contrasts': []
+    }
 
 
 class EnhancedPDFAccessibilityAnalyzer:
@@ -37,6 +88,29 @@ class EnhancedPDFAccessibilityAnalyzer:
     MIN_CONTRAST_RATIO = 4.5  # для обычного текста
     MIN_CONTRAST_LARGE = 3.0  # для крупного текста (18pt+ или 14pt жирный)
 
+    # Веса каналов R, G, B для относительной яркости
+    LUMINANCE_WEIGHTS = (0.2126, 0.7152, 0.0722)
+
+    # Перевод sRGB в линейные значения по таблице уровней канала:
+    # степень 2.4 считается один раз, а не для каждого символа.
+    # 4096 уровней вместо 256, чтобы дробные цвета PDF (0.5, 0.9...)
+    # не сдвигали контрастность в отчете
+    SRGB_LUT_SIZE = 4096
+    _levels = np.arange(SRGB_LUT_SIZE) / (SRGB_LUT_SIZE - 1)
+    SRGB_LUT = np.where(_levels <= 0.03928, _levels / 12.92, ((_levels + 0.055) / 1.055) ** 2.4)
+    SRGB_LUT_VALUES = SRGB_LUT.tolist()  # Та же таблица для скалярного calculate_luminance
+    del _levels
+
+    # Проблемные цвета по тону (Hue) для identify_problematic_color:
+    # (h от, h до, мин. яркость V, порог светлого оттенка, светлый, темный)
+    HUE_RULES = (
+        (0.2, 0.4, 0.4, 0.7, "светло-зеленый", "зеленый"),
+        (0.0, 0.05, 0.4, 0.7, "светло-красный", "красный"),
+        (0.95, 1.0, 0.4, 0.7, "светло-красный", "красный"),
+        (0.55, 0.75, 0.4, 0.7, "светло-синий", "синий"),
+        (0.05, 0.15, 0.6, 0.8, "желтый", "оранжевый"),
+    )
+
     # Хорошо читаемые шрифты для слабовидящих
     ACCESSIBLE_FONTS = {
         'Arial', 'Helvetica', 'Verdana', 'Tahoma', 'Calibri',
@@ -52,45 +126,158 @@ class EnhancedPDFAccessibilityAnalyzer:
         'Courier', 'Consolas', 'Monaco', 'Menlo', 'Source Code Pro'
     }
 
-    def __init__(self, pdf_path: str):
+    # Списки шрифтов, собранные в регулярные выражения: имя шрифта
+    # просматривается за один проход вместо цикла по всем названиям
+    ACCESSIBLE_FONTS_BY_KEY = {font.lower(): font for font in ACCESSIBLE_FONTS}
+    ACCESSIBLE_FONTS_RE = re.compile('|'.join(
+        re.escape(key) for key in sorted(ACCESSIBLE_FONTS_BY_KEY, key=len, reverse=True)))
+    POOR_READABILITY_FONTS_BY_KEY = {font.lower(): font for font in POOR_READABILITY_FONTS}
+    POOR_READABILITY_FONTS_RE = re.compile('|'.join(
+        re.escape(key) for key in sorted(POOR_READABILITY_FONTS_BY_KEY, key=len, reverse=True)))
+
+    # Поля символа pdfplumber, которые нужны анализу (и попадают в кэш)
+    CHAR_FIELDS = ('x0', 'y0', 'size', 'fontname', 'text', 'non_stroking_color')
+    # Допустимые типы значений полей символа (цвет проверяет normalize_color)
+    CHAR_FIELD_TYPES = (('x0', (int, float)), ('y0', (int, float)), ('size', (int, float)),
+                        ('fontname', str), ('text', str))
+
+    # Каталог кэша символов рядом с модулем (не зависит от текущей папки)
+    CHARS_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+    # Версия формата кэша: увеличивать при изменении извлечения символов;
+    # хэш CHAR_FIELDS отделяет записи с другим набором полей
+    CHARS_CACHE_FORMAT = f"v1-{hashlib.md5(','.join(CHAR_FIELDS).encode()).hexdigest()[:8]}"
+
+    # Суффиксы начертаний и производителя в названии шрифта
+    FONT_STYLE_RE = re.compile(r'-?(?:Bold|Italic)|MT|PS')
+
+    # Серия из 2 и более одинаковых символов подряд
+    DUPLICATE_CHARS_RE = re.compile(r'(.)\1+', re.DOTALL)
+
+    # Признаки жирного начертания в названии шрифта
+    # ('BoldItalic' и '-Bold' уже покрываются 'Bold')
+    BOLD_FONT_RE = re.compile(r'Bold|bold|Black|Heavy')
+
+    # Значения non_stroking_color, означающие черный текст
+    BLACK_COLORS = ((0, 0, 0), 0, None, (0,), [0])
+
+    # Слово для подсчета объема проблемного текста
+    WORD_RE = re.compile(r'\b\w+\b', re.UNICODE)
+
+    # Постоянные блоки рекомендаций в отчетах
+    COLOR_RECOMMENDATIONS = (
+        "1. Зеленый текст на белом фоне:\n"
+        "   • Проблема: светло-зеленый, салатовый (контрастность ~2.9-3.5:1)\n"
+        "   • Решение: используйте темно-зеленый (#006400, #228B22)\n"
+        "   • Результат: контрастность ~6.5:1 ✓\n\n"
+        "2. Серый текст на белом фоне:\n"
+        "   • Проблема: средне-серый (контрастность ~3.9:1)\n"
+        "   • Решение: используйте темно-серый (#333333) или черный (#000000)\n"
+        "   • Результат: контрастность 12.6:1 или 21:1 ✓\n\n"
+        "3. Желтый/оранжевый текст:\n"
+        "   • Проблема: яркий желтый/оранжевый (контрастность ~3.0:1)\n"
+        "   • Решение: используйте темные оттенки или замените на черный\n\n"
+        "4. Лучшие сочетания для доступности:\n"
+        "   • Черный (#000000) на белом: 21:1 ✓\n"
+        "   • Темно-серый (#333333) на белом: 12.6:1 ✓\n"
+        "   • Темно-синий (#000066) на белом: 8.6:1 ✓\n"
+        "   • Темно-зеленый (#006400) на белом: 6.5:1 ✓\n"
+    )
+    RECOMMENDATIONS_BY_TYPE = (
+        ('Контрастность', (
+            "1. УВЕЛИЧЬТЕ КОНТРАСТНОСТЬ ТЕКСТА:\n"
+            "   • Обычный текст: минимальная контрастность 4.5:1\n"
+            "   • Крупный текст (≥18pt или ≥14pt жирный): минимальная контрастность 3.0:1\n"
+            "   • Используйте: черный (#000000), темно-серый (#333333), темно-синий (#000066)\n\n")),
+        ('Размер шрифта', (
+            "2. УВЕЛИЧЬТЕ РАЗМЕР ШРИФТА:\n"
+            "   • Основной текст: минимальный размер 12pt (рекомендуется 14-16pt)\n"
+            "   • Заголовки: минимальный размер 14pt (рекомендуется 16-18pt)\n"
+            "   • Для слабовидящих: основной текст 16-18pt, заголовки 20-24pt\n\n")),
+        ('Читаемость шрифта', (
+            "3. ВЫБЕРИТЕ ЧИТАЕМЫЕ ШРИФТЫ:\n"
+            "   • Рекомендуется: Arial, Verdana, Tahoma, Georgia\n"
+            "   • Избегайте: декоративных, моноширинных, рукописных шрифтов\n\n")),
+    )
+    WCAG_STANDARDS = (
+        "📋 СТАНДАРТЫ WCAG 2.1 (Уровень AA):\n"
+        "   • Контрастность текста: 4.5:1 (3.0:1 для крупного текста)\n"
+        "   • Минимальный размер текста: эффективный визуальный размер 2.5мм\n"
+        "   • Использование цвета: не полагаться только на цвет для передачи информации\n"
+    )
+
+    # Порядок вывода уровней серьезности и их значки в отчетах
+    SEVERITY_ORDER = ('high', 'medium', 'low')
+    SEVERITY_ICONS = {'high': '🔴', 'medium': '🟡', 'low': '🟢'}
+
+    def __init__(self, pdf_path: str, debug: bool = False, backend: str = "pdfplumber",
+                 workers: int = 1, use_cache: bool = True):
         self.pdf_path = pdf_path
+        self.backend = backend  # Извлечение символов: 'pdfplumber' или 'fitz' (PyMuPDF)
+        self.workers = workers  # Число процессов для анализа страниц (1 - без пула)
+        self.debug = debug  # Собирать ли отладочный список problematic_colors_found
         self.issues: List[AccessibilityIssue] = []
         self.color_issues: List[dict] = []  # Специальный список проблем с цветами
-        self.line_cache = {}  # Кэш для строк текста
-        self.problematic_colors_found = []  # Для отладки
-        self.full_text_cache = {}  # Кэш для полного текста строк
+        self.warnings: Dict[str, int] = defaultdict(int)  # Предупреждение -> сколько раз встретилось
+        self._stats = None  # Статистика compute_all_stats (сбрасывается в invalidate_caches)
+        self._report_cache = {}  # Раздел отчета -> текст (сбрасывается в invalidate_caches)
+        self.problematic_colors_found = []  # Для отладки (только при debug=True)
+        self._pdf = None  # Открытый PDF для скриншотов (см. _ensure_pdf)
+        self._page_image = None  # Последний отрисованный кадр страницы: (номер, разрешение, PageImage)
         self.screenshots_dir = "accessibility_screenshots"
+        # Кэш символов страниц между запусками (None - кэш отключен)
+        self.chars_cache_dir = self.CHARS_CACHE_DIR if use_cache else None
+        self.file_fingerprint = None  # md5 содержимого PDF, считается один раз
+
+    def warn(self, message: str):
+        """Запоминает предупреждение; все они выводятся одной сводкой в конце анализа"""
+        self.warnings[message] += 1
+
+    def print_warnings(self):
+        """Выводит накопленные предупреждения"""
+        if not self.warnings:
+            return
+
+        print(f"⚠️ Предупреждения ({sum(self.warnings.values())}):")
+        for message, count in self.warnings.items():
+            print(f"  - {message}" + (f" (x{count})" if count > 1 else ""))
 
     def normalize_color(self, color) -> Tuple[float, float, float]:
         """Нормализует цвет в формат RGB (0-1)"""
-        try:
-            if isinstance(color, (int, float)):
-                # Монохромный цвет (grayscale)
-                return (float(color), float(color), float(color))
-            elif isinstance(color, tuple) or isinstance(color, list):
-                if len(color) == 1:
-                    # Монохромный
-                    return (float(color[0]), float(color[0]), float(color[0]))
-                elif len(color) == 3:
-                    # RGB
-                    return (float(color[0]), float(color[1]), float(color[2]))
-                elif len(color) == 4:
-                    # CMYK - конвертируем в RGB (упрощенно)
-                    c, m, y, k = color
-                    r = (1 - c) * (1 - k)
-                    g = (1 - m) * (1 - k)
-                    b = (1 - y) * (1 - k)
-                    return (r, g, b)
-            elif color is None:
-                # Цвет не указан - предполагаем черный
-                return (0.0, 0.0, 0.0)
-        except Exception as e:
-            print(f"⚠️ Ошибка нормализации цвета {color}: {e}")
+        if isinstance(color, (tuple, list)) and not all(isinstance(c, (int, float)) for c in color):
+            # Например, цвет узора (pattern) - в контрастность не переводится
+            self.warn(f"Неподдерживаемый цвет {color!r}, считаем черным")
+            return (0.0, 0.0, 0.0)
+
+        if isinstance(color, (int, float)):
+            # Монохромный цвет (grayscale)
+            return (float(color), float(color), float(color))
+        elif isinstance(color, tuple) or isinstance(color, list):
+            if len(color) == 1:
+                # Монохромный
+                return (float(color[0]), float(color[0]), float(color[0]))
+            elif len(color) == 3:
+                # RGB
+                return (float(color[0]), float(color[1]), float(color[2]))
+            elif len(color) == 4:
+                # CMYK - конвертируем в RGB (упрощенно)
+                c, m, y, k = color
+                r = (1 - c) * (1 - k)
+                g = (1 - m) * (1 - k)
+                b = (1 - y) * (1 - k)
+                return (r, g, b)
+        elif color is None:
+            # Цвет не указан - предполагаем черный
+            return (0.0, 0.0, 0.0)
 
         # По умолчанию черный
         return (0.0, 0.0, 0.0)
 
-    def is_large_text_by_wcag(self, font_size: float, font_name: str) -> bool:
+    # Шрифтов, размеров и цветов в документе единицы, а проверяется
+    # каждый символ - кэшируем чистые помощники. Кэш общий на класс
+    # (ключ - аргументы), поэтому не держит ссылок на экземпляры
+    @classmethod
+    @lru_cache(maxsize=2048)
+    def is_large_text_by_wcag(cls, font_size: float, font_name: str) -> bool:
         """
         Определяет, является ли текст крупным по WCAG 2.1
         Возвращает True если:
@@ -98,154 +285,122 @@ class EnhancedPDFAccessibilityAnalyzer:
         ИЛИ
         - Размер ≥ 14pt И текст жирный
         """
-        try:
-            # Проверяем, является ли шрифт жирным
-            is_bold = any(bold_term in font_name for bold_term in
-                          ['Bold', 'BoldItalic', 'Black', 'Heavy', '-Bold', 'bold'])
-
-            # Критерии WCAG
-            if font_size >= 18:
-                return True  # ≥18pt - всегда крупный
-            elif font_size >= 14 and is_bold:
-                return True  # ≥14pt И жирный - крупный
-            else:
-                return False  # не соответствует критериям
-        except:
-            return False
+        # Критерии WCAG
+        if font_size >= 18:
+            return True  # ≥18pt - всегда крупный
+        elif font_size >= 14 and cls.BOLD_FONT_RE.search(font_name):
+            return True  # ≥14pt И жирный - крупный
+        else:
+            return False  # не соответствует критериям
 
     def calculate_luminance(self, color: Tuple[float, float, float]) -> float:
         """Рассчитывает относительную яркость цвета (0-1)"""
-        try:
-            r, g, b = color
-
-            # Преобразование sRGB в линейные значения
-            def srgb_to_linear(channel):
-                if channel <= 0.03928:
-                    return channel / 12.92
-                return ((channel + 0.055) / 1.055) ** 2.4
-
-            r_linear = srgb_to_linear(r)
-            g_linear = srgb_to_linear(g)
-            b_linear = srgb_to_linear(b)
-
-            # Рассчет относительной яркости
-            return 0.2126 * r_linear + 0.7152 * g_linear + 0.0722 * b_linear
-        except:
-            return 0.0
+        # Скалярная версия: та же таблица SRGB_LUT, что и в calculate_luminance_array,
+        # но без построения массива на каждый вызов
+        lut = self.SRGB_LUT_VALUES
+        max_level = self.SRGB_LUT_SIZE - 1
+        r, g, b = color
+        if not (0.0 <= r <= 1.0 and 0.0 <= g <= 1.0 and 0.0 <= b <= 1.0):
+            r, g, b = (min(max(c, 0.0), 1.0) for c in color)
+        r_weight, g_weight, b_weight = self.LUMINANCE_WEIGHTS
+        return (r_weight * lut[int(r * max_level + 0.5)]
+                + g_weight * lut[int(g * max_level + 0.5)]
+                + b_weight * lut[int(b * max_level + 0.5)])
 
     def calculate_contrast_ratio(self, color1: Tuple[float, float, float],
                                  color2: Tuple[float, float, float]) -> float:
         """Рассчитывает контрастность между двумя цветами"""
-        try:
-            l1 = self.calculate_luminance(color1)
-            l2 = self.calculate_luminance(color2)
-
-            # Более светлый и темный цвета
-            lighter = max(l1, l2)
-            darker = min(l1, l2)
-
-            return (lighter + 0.05) / (darker + 0.05)
-        except:
-            return 1.0  # Минимальная контрастность при ошибке
+        l1 = self.calculate_luminance(color1)
+        l2 = self.calculate_luminance(color2)
+
+        # Более светлый и темный цвета
+        lighter = max(l1, l2)
+        darker = min(l1, l2)
+
+        return (lighter + 0.05) / (darker + 0.05)
+
+    def calculate_luminance_array(self, colors: np.ndarray) -> np.ndarray:
+        """Векторная версия calculate_luminance для массива цветов формы (N, 3)"""
+        # Преобразование sRGB в линейные значения через таблицу SRGB_LUT
+        max_level = self.SRGB_LUT_SIZE - 1
+        levels = np.clip(np.rint(colors * max_level), 0, max_level).astype(np.intp)
+        linear = self.SRGB_LUT[levels]
+        r_weight, g_weight, b_weight = self.LUMINANCE_WEIGHTS
+        return r_weight * linear[:, 0] + g_weight * linear[:, 1] + b_weight * linear[:, 2]
+
+    def calculate_contrast_ratios(self, colors1: np.ndarray, colors2: np.ndarray) -> np.ndarray:
+        """Векторная версия calculate_contrast_ratio для двух массивов цветов (N, 3)"""
+        l1 = self.calculate_luminance_array(colors1)
+        l2 = self.calculate_luminance_array(colors2)
+        return (np.maximum(l1, l2) + 0.05) / (np.minimum(l1, l2) + 0.05)
 
     def rgb_to_hsv(self, color: Tuple[float, float, float]) -> Tuple[float, float, float]:
         """Конвертирует RGB в HSV цветовое пространство"""
-        try:
-            return colorsys.rgb_to_hsv(color[0], color[1], color[2])
-        except:
-            return (0.0, 0.0, 0.0)
+        return colorsys.rgb_to_hsv(color[0], color[1], color[2])
 
-    def identify_problematic_color(self, color: Tuple[float, float, float]) -> Optional[str]:
+    @classmethod
+    @lru_cache(maxsize=2048)
+    def identify_problematic_color(cls, color: Tuple[float, float, float]) -> Optional[str]:
         """Определяет, является ли цвет проблемным для доступности"""
-        try:
-            # Конвертируем в HSV для лучшей идентификации
-            h, s, v = self.rgb_to_hsv(color)
-
-            # Определяем цвет по Hue
-            if 0.2 <= h <= 0.4:  # Зеленый диапазон
-                if s > 0.3 and v > 0.4:
-                    if v > 0.7:
-                        return "светло-зеленый"
-                    else:
-                        return "зеленый"
-            elif h <= 0.05 or h >= 0.95:  # Красный диапазон
-                if s > 0.3 and v > 0.4:
-                    if v > 0.7:
-                        return "светло-красный"
-                    else:
-                        return "красный"
-            elif 0.55 <= h <= 0.75:  # Синий диапазон
-                if s > 0.3 and v > 0.4:
-                    if v > 0.7:
-                        return "светло-синий"
-                    else:
-                        return "синий"
-            elif 0.05 <= h <= 0.15:  # Желтый/оранжевый
-                if s > 0.3 and v > 0.6:
-                    return "желтый" if v > 0.8 else "оранжевый"
+        # Конвертируем в HSV для лучшей идентификации
+        h, s, v = colorsys.rgb_to_hsv(*color)
 
-            # Проверяем серые оттенки
-            if s < 0.1 and 0.3 <= v <= 0.7:
-                return "серый"
+        # Определяем цвет по Hue: решает первый подходящий диапазон
+        for h_min, h_max, v_min, v_light, light_name, dark_name in cls.HUE_RULES:
+            if h_min <= h <= h_max:
+                if s > 0.3 and v > v_min:
+                    return light_name if v > v_light else dark_name
+                break
 
-            return None
-        except:
-            return None
+        # Проверяем серые оттенки
+        if s < 0.1 and 0.3 <= v <= 0.7:
+            return "серый"
 
-    def normalize_font_name(self, font_name: str) -> str:
-        """Нормализует название шрифта для сравнения"""
-        try:
-            if '+' in font_name:
-                font_name = font_name.split('+')[-1]
+        return None
 
-            font_name = font_name.replace('-Bold', '').replace('-Italic', '')
-            font_name = font_name.replace('Bold', '').replace('Italic', '')
-            font_name = font_name.replace('MT', '').replace('PS', '')
+    @classmethod
+    @lru_cache(maxsize=2048)
+    def normalize_font_name(cls, font_name: str) -> str:
+        """Нормализует название шрифта для сравнения"""
+        # Отбрасываем префикс подмножества шрифта (ABCDEF+Arial)
+        font_name = font_name.rpartition('+')[2]
 
-            return font_name.strip()
-        except:
-            return font_name
+        return cls.FONT_STYLE_RE.sub('', font_name).strip()
 
-    def check_font_readability(self, font_name: str) -> Tuple[bool, str]:
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def check_font_readability(cls, font_name: str) -> Tuple[bool, str]:
         """Проверяет, относится ли шрифт к хорошо читаемым"""
-        try:
-            normalized_name = self.normalize_font_name(font_name)
+        normalized_name = cls.normalize_font_name(font_name)
+        name_key = normalized_name.lower()
 
-            for accessible_font in self.ACCESSIBLE_FONTS:
-                if accessible_font.lower() in normalized_name.lower():
-                    return True, f"Хорошо читаемый шрифт: {accessible_font}"
+        match = cls.ACCESSIBLE_FONTS_RE.search(name_key)
+        if match:
+            accessible_font = cls.ACCESSIBLE_FONTS_BY_KEY[match.group()]
+            return True, f"Хорошо читаемый шрифт: {accessible_font}"
 
-            for poor_font in self.POOR_READABILITY_FONTS:
-                if poor_font.lower() in normalized_name.lower():
-                    return False, f"Плохо читаемый шрифт: {poor_font}"
+        match = cls.POOR_READABILITY_FONTS_RE.search(name_key)
+        if match:
+            poor_font = cls.POOR_READABILITY_FONTS_BY_KEY[match.group()]
+            return False, f"Плохо читаемый шрифт: {poor_font}"
 
-            return False, f"Неизвестный шрифт: {normalized_name}"
-        except:
-            return True, "Не удалось определить шрифт"
+        return False, f"Неизвестный шрифт: {normalized_name}"
 
     def extract_background_color(self, page, x: float, y: float) -> Tuple[float, float, float]:
         """Упрощенная версия определения цвета фона"""
         return (1.0, 1.0, 1.0)  # белый фон
 
-    def remove_duplicate_chars(self, text: str) -> str:
+    # Превью одной строки повторяется у всех ее символов, а в отчетах
+    # один и тот же текст нормализуется для каждой проблемы
+    @classmethod
+    @lru_cache(maxsize=100_000)
+    def remove_duplicate_chars(cls, text: str) -> str:
         """Удаляет дублированные символы из текста"""
         if not text or len(text) < 2:
             return text
 
-        # Паттерн для поиска дублированных символов (2 или более подряд)
-
         # Удаляем последовательные дубликаты
-        result = []
-        i = 0
-        while i < len(text):
-            result.append(text[i])
-            # Пропускаем следующие одинаковые символы
-            j = i + 1
-            while j < len(text) and text[j] == text[i]:
-                j += 1
-            i = j
-
-        cleaned = ''.join(result)
+        cleaned = cls.DUPLICATE_CHARS_RE.sub(r'\1', text)
 
         # Также убираем дубли через каждые 2 символа
         # (типа "ГЛООССААРРИИЙЙ")
@@ -263,28 +418,32 @@ class EnhancedPDFAccessibilityAnalyzer:
 
         return cleaned
 
-    def count_words(self, text: str) -> int:
+    @classmethod
+    @lru_cache(maxsize=8192)
+    def count_words(cls, text: str) -> int:
         """Подсчитывает количество слов в тексте"""
         if not text or not text.strip():
             return 0
         
         # Нормализуем текст - убираем дубли
-        normalized = self.remove_duplicate_chars(text.strip())
+        normalized = cls.remove_duplicate_chars(text.strip())
         if not normalized:
             return 0
         
         # Разбиваем на слова (разделители: пробелы, знаки препинания)
         # Используем регулярное выражение для более точного подсчета
-        words = re.findall(r'\b\w+\b', normalized, re.UNICODE)
+        words = cls.WORD_RE.findall(normalized)
         return len(words)
 
-    def normalize_text_for_grouping(self, text: str) -> str:
+    @classmethod
+    @lru_cache(maxsize=100_000)
+    def normalize_text_for_grouping(cls, text: str) -> str:
         """Нормализует текст для группировки"""
         if not text:
             return text
 
         # 1. Удаляем дублированные символы
-        text = self.remove_duplicate_chars(text)
+        text = cls.remove_duplicate_chars(text)
 
         # 2. Удаляем лишние пробелы и приводим к нижнему регистру
         text = ' '.join(text.split()).lower()
@@ -294,181 +453,292 @@ class EnhancedPDFAccessibilityAnalyzer:
 
         return text
 
-    def get_text_line(self, page, y_position: float, tolerance: float = 2.0) -> Tuple[List[dict], str]:
-        """Получает все символы в строке по Y-координате и полный текст строки"""
-        try:
-            cache_key = (id(page), round(y_position, 2))
+    def get_file_fingerprint(self) -> str:
+        """Возвращает md5 содержимого PDF - ключ дискового кэша"""
+        if self.file_fingerprint is None:
+            file_hash = hashlib.md5()
+            with open(self.pdf_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    file_hash.update(chunk)
+            self.file_fingerprint = file_hash.hexdigest()
+        return self.file_fingerprint
+
+    def open_document(self):
+        """Открывает PDF библиотекой, выбранной в backend"""
+        if self.backend == 'fitz':
+            return fitz.open(self.pdf_path)
+        return pdfplumber.open(self.pdf_path)
+
+    def get_document_pages(self, pdf) -> list:
+        """Возвращает страницы документа, открытого open_document"""
+        if self.backend == 'fitz':
+            return list(pdf)
+        return pdf.pages
+
+    def extract_page_chars(self, page) -> List[dict]:
+        """Извлекает символы страницы в формате символов pdfplumber"""
+        if self.backend == 'fitz':
+            return self.extract_chars_fitz(page)
+        return [{field: char[field] for field in self.CHAR_FIELDS if field in char}
+                for char in page.chars]
+
+    def extract_chars_fitz(self, page) -> List[dict]:
+        """
+        Извлекает символы страницы через PyMuPDF (в разы быстрее pdfminer)
+        и приводит их к полям символов pdfplumber из CHAR_FIELDS.
+        Не точная замена pdfplumber: нижняя граница символа (y0) считается
+        по метрикам шрифта PyMuPDF, а не pdfminer, и часть символов PyMuPDF
+        может не вернуть, поэтому разбивка на строки и число проблем
+        могут отличаться
+        """
+        page_height = page.rect.height
+        chars = []
+
+        for block in page.get_text("rawdict")["blocks"]:
+            # У блоков с изображениями нет строк
+            for line in block.get("lines", []):
+                for span in line["spans"]:
+                    # Цвет в PyMuPDF - целое sRGB 0xRRGGBB
+                    srgb = span["color"]
+                    color = ((srgb >> 16 & 0xFF) / 255, (srgb >> 8 & 0xFF) / 255, (srgb & 0xFF) / 255)
+
+                    for char in span["chars"]:
+                        x0, y0, x1, y1 = char["bbox"]
+                        chars.append({
+                            'x0': x0,
+                            'y0': page_height - y1,  # в pdfplumber Y отсчитывается снизу страницы
+                            'size': span["size"],
+                            'fontname': span["font"],
+                            'text': char["c"],
+                            'non_stroking_color': color
+                        })
 
-            if cache_key not in self.line_cache:
-                line_chars = []
-                for char in page.chars:
-                    if abs(char['y0'] - y_position) < tolerance:
-                        line_chars.append(char)
+        return chars
 
-                # Сортируем по X координате
-                line_chars.sort(key=lambda c: c['x0'])
+    def get_page_chars(self, page_num: int, page) -> List[dict]:
+        """
+        Возвращает символы страницы. При повторном анализе того же файла
+        символы читаются из кэша на диске, и разбор страницы pdfminer пропускается
+        """
+        if self.chars_cache_dir is None:
+            return self.extract_page_chars(page)
 
-                # Получаем полный текст строки
-                line_text = ''.join([c.get('text', '') for c in line_chars])
+        cache_path = os.path.join(self.chars_cache_dir, self.CHARS_CACHE_FORMAT,
+                                  self.get_file_fingerprint(), self.backend, f"{page_num}.pkl")
 
-                self.line_cache[cache_key] = (line_chars, line_text)
-                self.full_text_cache[cache_key] = line_text
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
 
-            return self.line_cache[cache_key]
-        except:
-            return ([], "")
+        chars = self.extract_page_chars(page)
 
-    def analyze_text_line_contrast(self, page_num: int, line_chars: List[dict], line_text: str) -> List[
-        AccessibilityIssue]:
-        """Анализирует контрастность целой строки текста"""
-        issues = []
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, 'wb') as f:
+                pickle.dump(chars, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except (OSError, pickle.PicklingError) as e:
+            self.warn(f"Не удалось сохранить кэш страницы {page_num}: {e}")
 
-        if not line_chars or not line_text.strip():
-            return issues
+        return chars
 
-        try:
-            # Нормализуем текст - убираем дубли
-            normalized_line_text = self.remove_duplicate_chars(line_text.strip())
-            if not normalized_line_text or len(normalized_line_text) < 3:
-                return issues
+    def build_line_index(self, chars: List[dict],
+                         tolerance: float = 2.0) -> Dict[int, Tuple[List[dict], str]]:
+        """
+        Раскладывает символы страницы по строкам за один проход.
+        Возвращает {ключ строки: (символы строки по X, текст строки)}
+        """
+        buckets = defaultdict(list)
+        for char in chars:
+            buckets[round(char['y0'] / tolerance)].append(char)
 
-            # Получаем средние параметры строки
-            avg_size = sum(char.get('size', 12) for char in line_chars) / len(line_chars)
-            is_bold = any('Bold' in char.get('fontname', '') for char in line_chars)
-            is_large_wcag = self.is_large_text_by_wcag(avg_size, line_chars[0].get('fontname', ''))
+        line_index = {}
+        for line_key, line_chars in buckets.items():
+            # Сортируем по X координате
+            line_chars.sort(key=lambda c: c['x0'])
 
-            # Определяем требуемую контрастность
-            required_contrast = self.MIN_CONTRAST_LARGE if is_large_wcag else self.MIN_CONTRAST_RATIO
+            # Получаем полный текст строки
+            line_text = ''.join([c.get('text', '') for c in line_chars])
 
-            # Анализируем каждый символ
-            for char in line_chars:
-                try:
-                    raw_color = char.get('non_stroking_color', (0, 0, 0))
-                    text_color = self.normalize_color(raw_color)
-
-                    # Для отладки - сохраняем найденные цвета
-                    if raw_color not in [(0, 0, 0), 0, None, (0,), [0]]:
-                        self.problematic_colors_found.append({
-                            'page': page_num,
-                            'color': raw_color,
-                            'normalized': text_color,
-                            'text': char.get('text', '')
-                        })
+            line_index[line_key] = (line_chars, line_text)
 
-                    bg_color = self.extract_background_color(None, char.get('x0', 0), char.get('y0', 0))
-                    contrast_ratio = self.calculate_contrast_ratio(text_color, bg_color)
+        return line_index
 
-                    if contrast_ratio < required_contrast:
-                        # Определяем проблемный цвет
-                        color_name = self.identify_problematic_color(text_color)
+    def get_text_line(self, line_index: Dict[int, Tuple[List[dict], str]], y_position: float,
+                      tolerance: float = 2.0) -> Tuple[List[dict], str]:
+        """Получает все символы в строке по Y-координате и полный текст строки"""
+        return line_index.get(round(y_position / tolerance), ([], ""))
 
-                        # Определяем серьезность
-                        if contrast_ratio < 2.0:
-                            severity = 'high'
-                        elif contrast_ratio < 3.0:
-                            severity = 'medium'
-                        else:
-                            severity = 'low'
+    def analyze_text_line_contrast(self, page_num: int, line_chars: List[dict], line_text: str) -> List[
+        AccessibilityIssue]:
+        """Анализирует контрастность целой строки текста"""
+        issues = []
 
-                        # Улучшенное описание проблемы
-                        if is_large_wcag:
-                            size_info = f"Крупный текст ({avg_size:.1f}pt{' жирный' if is_bold else ''})"
-                            contrast_req = f"требуется ≥3.0:1"
-                        else:
-                            size_info = f"Обычный текст ({avg_size:.1f}pt)"
-                            contrast_req = f"требуется ≥4.5:1"
+        if not line_chars or not line_text.strip():
+            return issues
 
-                        issue_desc = f"{size_info}. Контрастность: {contrast_ratio:.1f}:1 ({contrast_req})"
-                        if color_name:
-                            issue_desc += f". Проблемный цвет: {color_name}"
+        # Нормализуем текст - убираем дубли
+        normalized_line_text = self.remove_duplicate_chars(line_text.strip())
+        if not normalized_line_text or len(normalized_line_text) < 3:
+            return issues
 
-                        # Получаем больше текста для примера (нормализованного)
-                        text_preview = normalized_line_text
-                        if len(text_preview) > 150:
-                            text_preview = text_preview[:147] + "..."
+        # Получаем средние параметры строки
+        avg_size = sum(char.get('size', 12) for char in line_chars) / len(line_chars)
+        # Жирность - свойство шрифта, поэтому проверяем только разные шрифты строки
+        is_bold = any('Bold' in font_name for font_name in {char.get('fontname', '') for char in line_chars})
+        is_large_wcag = self.is_large_text_by_wcag(avg_size, line_chars[0].get('fontname', ''))
+
+        # Определяем требуемую контрастность
+        required_contrast = self.MIN_CONTRAST_LARGE if is_large_wcag else self.MIN_CONTRAST_RATIO
+
+        # Черный текст на белом фоне (см. extract_background_color) дает 21:1
+        # и проверку проходит всегда - такие символы (обычно почти весь текст)
+        # отбрасываем до нормализации цветов
+        line_chars = [char for char in line_chars
+                      if char.get('non_stroking_color', (0, 0, 0)) not in self.BLACK_COLORS]
+        if not line_chars:
+            return issues
 
-                        issues.append(AccessibilityIssue(
-                            page=page_num,
-                            x=char.get('x0', 0),
-                            y=char.get('y0', 0),
-                            text=text_preview,
-                            issue_type='Контрастность',
-                            description=issue_desc,
-                            severity=severity,
-                            font_name=char.get('fontname', ''),
-                            font_size=char.get('size', 12),
-                            color=text_color,
-                            background_color=bg_color
-                        ))
+        # Цвета всех символов строки переводим в массивы и считаем
+        # контрастность разом; в Python-цикл попадают только символы,
+        # не прошедшие проверку
+        raw_colors = [char.get('non_stroking_color', (0, 0, 0)) for char in line_chars]
+        text_colors = [self.normalize_color(raw_color) for raw_color in raw_colors]
+        bg_colors = [self.extract_background_color(None, char.get('x0', 0), char.get('y0', 0))
+                     for char in line_chars]
+        contrast_ratios = self.calculate_contrast_ratios(np.array(text_colors, dtype=float),
+                                                         np.array(bg_colors, dtype=float))
+
+        # Для отладки - сохраняем найденные цвета (список растет
+        # на каждый цветной символ, поэтому только по флагу debug)
+        if self.debug:
+            for char, raw_color, text_color in zip(line_chars, raw_colors, text_colors):
+                self.problematic_colors_found.append({
+                    'page': page_num,
+                    'color': raw_color,
+                    'normalized': text_color,
+                    'text': char.get('text', '')
+                })
+
+        # Анализируем символы с недостаточной контрастностью
+        for i in np.flatnonzero(contrast_ratios < required_contrast):
+            char = line_chars[i]
+            raw_color = raw_colors[i]
+            text_color = text_colors[i]
+            bg_color = bg_colors[i]
+            contrast_ratio = float(contrast_ratios[i])
+
+            # Определяем проблемный цвет
+            color_name = self.identify_problematic_color(text_color)
+
+            # Определяем серьезность
+            if contrast_ratio < 2.0:
+                severity = 'high'
+            elif contrast_ratio < 3.0:
+                severity = 'medium'
+            else:
+                severity = 'low'
 
-                        # Добавляем в отдельный список проблемных цветов (с нормализованным текстом)
-                        if color_name and contrast_ratio < 4.5:
-                            self.color_issues.append({
-                                'page': page_num,
-                                'raw_color': raw_color,
-                                'color': text_color,
-                                'color_name': color_name,
-                                'contrast': contrast_ratio,
-                                'required': required_contrast,
-                                'text_sample': normalized_line_text[:100].strip(),
-                                'full_text': normalized_line_text.strip(),
-                                'position': (char.get('x0', 0), char.get('y0', 0)),
-                                'is_large': is_large_wcag,
-                                'font_size': char.get('size', 12)
-                            })
-                except Exception:
-                    continue  # Пропускаем проблемные символы
-
-        except Exception:
-            pass  # Пропускаем проблемные строки
+            # Улучшенное описание проблемы
+            if is_large_wcag:
+                size_info = f"Крупный текст ({avg_size:.1f}pt{' жирный' if is_bold else ''})"
+                contrast_req = f"требуется ≥3.0:1"
+            else:
+                size_info = f"Обычный текст ({avg_size:.1f}pt)"
+                contrast_req = f"требуется ≥4.5:1"
+
+            issue_desc = f"{size_info}. Контрастность: {contrast_ratio:.1f}:1 ({contrast_req})"
+            if color_name:
+                issue_desc += f". Проблемный цвет: {color_name}"
+
+            # Получаем больше текста для примера (нормализованного)
+            text_preview = normalized_line_text
+            if len(text_preview) > 150:
+                text_preview = text_preview[:147] + "..."
+
+            issues.append(AccessibilityIssue(
+                page=page_num,
+                x=char.get('x0', 0),
+                y=char.get('y0', 0),
+                text=text_preview,
+                issue_type='Контрастность',
+                description=issue_desc,
+                severity=severity,
+                font_name=char.get('fontname', ''),
+                font_size=char.get('size', 12),
+                color=text_color,
+                background_color=bg_color
+            ))
+
+            # Добавляем в отдельный список проблемных цветов (с нормализованным текстом)
+            if color_name and contrast_ratio < 4.5:
+                self.color_issues.append({
+                    'page': page_num,
+                    'raw_color': raw_color,
+                    'color': text_color,
+                    'color_name': color_name,
+                    'contrast': contrast_ratio,
+                    'required': required_contrast,
+                    'text_sample': normalized_line_text[:100].strip(),
+                    'full_text': normalized_line_text.strip(),
+                    'position': (char.get('x0', 0), char.get('y0', 0)),
+                    'is_large': is_large_wcag,
+                    'font_size': char.get('size', 12)
+                })
 
         return issues
 
+    def is_valid_char(self, char: dict) -> bool:
+        """
+        Проверяет типы полей символа. Символ с некорректным полем
+        (например, size=None) пропускается с предупреждением,
+        остальные символы страницы анализируются как обычно
+        """
+        for field, types in self.CHAR_FIELD_TYPES:
+            if field in char and not isinstance(char[field], types):
+                self.warn(f"Пропущен символ с некорректным полем {field}: {type(char[field]).__name__}")
+                return False
+        return True
+
     def analyze_page(self, page_num: int, page) -> List[AccessibilityIssue]:
         """Анализирует одну страницу на проблемы доступности"""
         page_issues = []
-        processed_lines = set()
 
         try:
-            # Проходим по всем символам
-            for char in page.chars:
-                try:
-                    # Пропускаем пробелы и непечатаемые символы
-                    char_text = char.get('text', '')
-                    if char_text.isspace() or not char_text.strip():
-                        continue
+            # Символы страницы извлекаются один раз, проверяются
+            # и сразу раскладываются по строкам
+            chars = [char for char in self.get_page_chars(page_num, page) if self.is_valid_char(char)]
+            line_index = self.build_line_index(chars)
+
+            for line_chars, line_text in line_index.values():
+                # Пропускаем пробелы и непечатаемые символы
+                text_chars = [char for char in line_chars if char.get('text', '').strip()]
+                if not text_chars:
+                    continue
 
-                    # Получаем строку, если еще не обрабатывали
-                    line_y = round(char.get('y0', 0), 2)
-                    if line_y not in processed_lines:
-                        line_chars, line_text = self.get_text_line(page, char.get('y0', 0))
+                # 1. Анализируем контрастность строки
+                contrast_issues = self.analyze_text_line_contrast(page_num, line_chars, line_text)
+                page_issues.extend(contrast_issues)
 
-                        # Анализируем контрастность строки (только если есть текст)
-                        if line_text.strip():
-                            contrast_issues = self.analyze_text_line_contrast(page_num, line_chars, line_text)
-                            page_issues.extend(contrast_issues)
+                # Текст строки нормализуем один раз для всех её символов
+                normalized_text = self.remove_duplicate_chars(line_text.strip())
+                if not normalized_text or len(normalized_text) < 3:
+                    continue
 
-                        processed_lines.add(line_y)
+                text_preview = self.truncate_text(normalized_text, 80)
 
+                for char in text_chars:
                     # 2. ПРОВЕРКА РАЗМЕРА ШРИФТА (индивидуальная)
                     font_size = char.get('size', 12)
                     font_name = char.get('fontname', '')
                     is_bold = 'Bold' in font_name
                     is_large_wcag = self.is_large_text_by_wcag(font_size, font_name)
 
-                    # Получаем строку для текста
-                    line_chars, line_text = self.get_text_line(page, char.get('y0', 0))
-                    normalized_text = self.remove_duplicate_chars(line_text.strip())
-
-                    if not normalized_text or len(normalized_text) < 3:
-                        continue
-
                     # Определяем тип текста
                     if is_bold and font_size >= 14:
                         # Заголовок
                         if font_size < self.MIN_HEADING_SIZE:
-                            text_preview = normalized_text[:80] + ("..." if len(normalized_text) > 80 else "")
-
                             page_issues.append(AccessibilityIssue(
                                 page=page_num,
                                 x=char.get('x0', 0),
@@ -482,8 +752,6 @@ class EnhancedPDFAccessibilityAnalyzer:
                             ))
                     elif not is_large_wcag:  # Обычный текст (не крупный по WCAG)
                         if font_size < self.MIN_FONT_SIZE:
-                            text_preview = normalized_text[:80] + ("..." if len(normalized_text) > 80 else "")
-
                             page_issues.append(AccessibilityIssue(
                                 page=page_num,
                                 x=char.get('x0', 0),
@@ -500,8 +768,6 @@ class EnhancedPDFAccessibilityAnalyzer:
                     is_readable, readability_info = self.check_font_readability(font_name)
 
                     if not is_readable:
-                        text_preview = normalized_text[:80] + ("..." if len(normalized_text) > 80 else "")
-
                         page_issues.append(AccessibilityIssue(
                             page=page_num,
                             x=char.get('x0', 0),
@@ -513,11 +779,16 @@ class EnhancedPDFAccessibilityAnalyzer:
                             font_name=font_name,
                             font_size=font_size
                         ))
-                except:
-                    continue  # Пропускаем проблемные символы
 
         except Exception as e:
-            print(f"⚠️ Ошибка при анализе страницы {page_num}: {e}")
+            # Некорректные символы отсеяны выше; сюда попадают только
+            # непредвиденные ошибки, и они не должны останавливать анализ документа
+            self.warn(f"Ошибка при анализе страницы {page_num}: {e}")
+
+        # Освобождаем разобранные pdfplumber объекты страницы,
+        # чтобы память не копилась от страницы к странице
+        if hasattr(page, 'flush_cache'):
+            page.flush_cache()
 
         return page_issues
 
@@ -549,42 +820,73 @@ class EnhancedPDFAccessibilityAnalyzer:
             }
         }
 
-        # Проходим по всем проблемам
-        for issue in self.issues:
-            # Подсчитываем слова в тексте проблемы
-            word_count = self.count_words(issue.text)
-            
+        # Плоские счетчики по (тип, серьезность, текст) из общего прохода по проблемам.
+        # Одинаковый текст повторяется у многих символов строки, поэтому слова
+        # считаются один раз на уникальный текст, а не на каждую проблему
+        stats = self.compute_all_stats()
+        places_by_key = stats['places_by_key']
+        pages_by_type = stats['pages_by_type']
+
+        overall = summary['overall']
+        for (issue_type, severity, text), places in places_by_key.items():
+            words = self.count_words(text) * places
+
             # 1. Группировка по типу + серьезность (вложенная)
-            type_sev_group = summary['by_type_severity'][issue.issue_type]
-            type_sev_group[issue.severity]['places'] += 1
-            type_sev_group[issue.severity]['words'] += word_count
+            type_sev_group = summary['by_type_severity'][issue_type][severity]
+            type_sev_group['places'] += places
+            type_sev_group['words'] += words
 
             # 2. Группировка по типу (суммарно)
-            type_group = summary['by_type'][issue.issue_type]
-            type_group['total_places'] += 1
-            type_group['total_words'] += word_count
-            type_group['pages_affected'].add(issue.page)
+            type_group = summary['by_type'][issue_type]
+            type_group['total_places'] += places
+            type_group['total_words'] += words
 
             # 3. Группировка по серьезности
-            severity_group = summary['by_severity'][issue.severity]
-            severity_group['places'] += 1
-            severity_group['words'] += word_count
-            severity_group['types'][issue.issue_type]['places'] += 1
-            severity_group['types'][issue.issue_type]['words'] += word_count
+            severity_group = summary['by_severity'][severity]
+            severity_group['places'] += places
+            severity_group['words'] += words
+            severity_group['types'][issue_type]['places'] += places
+            severity_group['types'][issue_type]['words'] += words
 
             # 4. Общая статистика
-            summary['overall']['total_places'] += 1
-            summary['overall']['total_words'] += word_count
-            summary['overall']['pages_with_issues'].add(issue.page)
-            summary['overall']['types_distribution'][issue.issue_type] += 1
-            summary['overall']['severity_distribution'][issue.severity] += 1
+            overall['total_places'] += places
+            overall['total_words'] += words
+            overall['types_distribution'][issue_type] += places
+            overall['severity_distribution'][severity] += places
+
+        for issue_type, pages in pages_by_type.items():
+            summary['by_type'][issue_type]['pages_affected'] = set(pages)
+            overall['pages_with_issues'].update(pages)
 
         return summary
 
+    def _ensure_pdf(self):
+        """Открывает PDF один раз и переиспользует его для всех скриншотов"""
+        if self._pdf is None:
+            self._pdf = pdfplumber.open(self.pdf_path)
+        return self._pdf
+
+    def close(self):
+        """Закрывает PDF, открытый для скриншотов"""
+        self._page_image = None
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+    def _get_page_image(self, page_num: int, page, resolution: int):
+        """
+        Растеризует страницу один раз: несколько скриншотов одной страницы
+        вырезаются из уже готового изображения
+        """
+        if self._page_image is None or self._page_image[:2] != (page_num, resolution):
+            self._page_image = (page_num, resolution, page.to_image(resolution=resolution))
+        return self._page_image[2]
+
     def create_screenshot(self, page_num: int, bbox: Tuple[float, float, float, float] = None,
                           issue_type: str = None, output_dir: str = None,
                           full_page: bool = False, highlight_issue: bool = False,
-                          issue_position: Tuple[float, float] = None) -> Optional[str]:
+                          issue_position: Tuple[float, float] = None,
+                          resolution: int = 100) -> Optional[str]:
         """
         Создает скриншот страницы или области
 
@@ -596,6 +898,7 @@ class EnhancedPDFAccessibilityAnalyzer:
             full_page: если True, создает скриншот всей страницы
             highlight_issue: если True, выделяет проблемную область
             issue_position: позиция проблемы (x, y) для выделения
+            resolution: разрешение скриншота, dpi
 
         Returns:
             Путь к сохраненному скриншоту или None
@@ -607,69 +910,71 @@ class EnhancedPDFAccessibilityAnalyzer:
             # Создаем директорию, если не существует
             os.makedirs(output_dir, exist_ok=True)
 
-            with pdfplumber.open(self.pdf_path) as pdf:
-                if page_num > len(pdf.pages):
-                    return None
+            pdf = self._ensure_pdf()
 
-                page = pdf.pages[page_num - 1]
+            if page_num > len(pdf.pages):
+                return None
 
-                if full_page:
-                    # Создаем скриншот всей страницы
-                    im = page.to_image(resolution=150)
+            page = pdf.pages[page_num - 1]
+            page_image = self._get_page_image(page_num, page, resolution)
+
+            if full_page:
+                # Создаем скриншот всей страницы (сбрасываем прежние выделения)
+                im = page_image.reset()
+                screenshot_type = "full_page"
+            else:
+                if bbox is None:
+                    # Если bbox не указан, используем всю страницу
+                    bbox = (0, 0, page.width, page.height)
                     screenshot_type = "full_page"
                 else:
-                    if bbox is None:
-                        # Если bbox не указан, используем всю страницу
-                        bbox = (0, 0, page.width, page.height)
-                        screenshot_type = "full_page"
-                    else:
-                        # Добавляем отступы вокруг проблемной области
-                        padding = 50 if highlight_issue else 20
-                        x0, y0, x1, y1 = bbox
-                        x0 = max(0, x0 - padding)
-                        y0 = max(0, y0 - padding)
-                        x1 = min(page.width, x1 + padding)
-                        y1 = min(page.height, y1 + padding)
-
-                        # Вырезаем область
-                        cropped_page = page.crop((x0, y0, x1, y1))
-                        im = cropped_page.to_image(resolution=150)
-                        screenshot_type = "area"
-
-                # Если нужно выделить проблемную область
-                if highlight_issue and issue_position:
-                    try:
-                        # Конвертируем координаты для выделения
-                        if not full_page:
-                            # Для частичного скриншота
-                            x, y = issue_position
-                            rel_x = x - bbox[0] if bbox else x
-                            rel_y = y - bbox[1] if bbox else y
-
-                            # Добавляем выделение (красный прямоугольник)
-                            im.draw_rect((rel_x - 10, rel_y - 5, rel_x + 100, rel_y + 10),
-                                         fill=None, stroke="red", stroke_width=3)
-
-                            # Добавляем текст с типом проблемы
-                            if issue_type:
-                                im.draw_text((rel_x, rel_y - 20), issue_type,
-                                             fill="red", font_size=12)
-                    except Exception as e:
-                        print(f"⚠️ Ошибка при выделении проблемы: {e}")
-
-                # Генерируем имя файла
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                if issue_type:
-                    filename = f"page_{page_num}_{issue_type}_{screenshot_type}_{timestamp}.png"
-                else:
-                    filename = f"page_{page_num}_{screenshot_type}_{timestamp}.png"
-                filepath = os.path.join(output_dir, filename)
+                    # Добавляем отступы вокруг проблемной области
+                    padding = 50 if highlight_issue else 20
+                    x0, y0, x1, y1 = bbox
+                    x0 = max(0, x0 - padding)
+                    y0 = max(0, y0 - padding)
+                    x1 = min(page.width, x1 + padding)
+                    y1 = min(page.height, y1 + padding)
+
+                    # Вырезаем область из готового изображения страницы
+                    cropped_page = page.crop((x0, y0, x1, y1))
+                    im = PageImage(cropped_page, original=page_image.original, resolution=resolution)
+                    screenshot_type = "area"
+
+            # Если нужно выделить проблемную область
+            if highlight_issue and issue_position:
+                try:
+                    # Конвертируем координаты для выделения
+                    if not full_page:
+                        # Для частичного скриншота
+                        x, y = issue_position
+                        rel_x = x - bbox[0] if bbox else x
+                        rel_y = y - bbox[1] if bbox else y
+
+                        # Добавляем выделение (красный прямоугольник)
+                        im.draw_rect((rel_x - 10, rel_y - 5, rel_x + 100, rel_y + 10),
+                                     fill=None, stroke="red", stroke_width=3)
+
+                        # Добавляем текст с типом проблемы
+                        if issue_type:
+                            im.draw_text((rel_x, rel_y - 20), issue_type,
+                                         fill="red", font_size=12)
+                except Exception as e:
+                    print(f"⚠️ Ошибка при выделении проблемы: {e}")
+
+            # Генерируем имя файла
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            if issue_type:
+                filename = f"page_{page_num}_{issue_type}_{screenshot_type}_{timestamp}.png"
+            else:
+                filename = f"page_{page_num}_{screenshot_type}_{timestamp}.png"
+            filepath = os.path.join(output_dir, filename)
 
-                # Сохраняем изображение
-                im.save(filepath, format="PNG", quality=95)
+            # Сохраняем изображение
+            im.save(filepath, format="PNG", compress_level=6)
 
-                print(f"📸 Скриншот сохранен: {filepath}")
-                return filepath
+            print(f"📸 Скриншот сохранен: {filepath}")
+            return filepath
 
         except Exception as e:
             print(f"⚠️ Ошибка при создании скриншота: {e}")
@@ -694,8 +999,7 @@ class EnhancedPDFAccessibilityAnalyzer:
         # Определяем, для каких страниц делать скриншоты
         if pages is None:
             # Создаем скриншоты для всех страниц с проблемами
-            pages_with_issues = set(issue.page for issue in self.issues)
-            pages = sorted(pages_with_issues)
+            pages = sorted(self.compute_all_stats()['page_places'])
 
         print(f"\n📸 Создание полностаничных скриншотов для {len(pages)} страниц...")
 
@@ -714,6 +1018,12 @@ class EnhancedPDFAccessibilityAnalyzer:
         print(f"\n✅ Создано {len(screenshots)} полностаничных скриншотов")
         return screenshots
 
+    def truncate_text(self, text: str, max_length: int = 80) -> str:
+        """Обрезает текст до max_length символов, добавляя многоточие"""
+        if len(text) <= max_length:
+            return text
+        return text[:max_length] + "..."
+
     def truncate_text_smart(self, text: str, max_length: int = 50) -> str:
         """Умное обрезание текста по границе слова"""
         if len(text) <= max_length:
@@ -733,17 +1043,16 @@ class EnhancedPDFAccessibilityAnalyzer:
         Группирует проблемы по нормализованному тексту и страницам
         Возвращает: {текст: {страницы: {страница: [проблемы]}, count: X, first_issue: проблема}}
         """
-        text_groups = defaultdict(lambda: {
-            'pages': defaultdict(list),
-            'total_count': 0,
-            'first_issue': None,
-            'issue_types': set(),
-            'descriptions': set()
-        })
+        text_groups = defaultdict(_new_text_page_group)
 
         for issue in issues:
+            # Нормализация только укорачивает текст, поэтому короткие
+            # тексты отбрасываем, не нормализуя
+            if len(issue.text) < 3:
+                continue
+
             # Нормализуем текст (убираем дубли и приводим к нижнему регистру)
-            normalized_text = self.normalize_text_for_grouping(issue.text)
+            normalized_text = issue.normalized_text or self.normalize_text_for_grouping(issue.text)
 
             if len(normalized_text) < 3:  # Пропускаем слишком короткие тексты
                 continue
@@ -752,7 +1061,6 @@ class EnhancedPDFAccessibilityAnalyzer:
             group['pages'][issue.page].append(issue)
             group['total_count'] += 1
             group['issue_types'].add(issue.issue_type)
-            group['descriptions'].add(issue.description)
 
             # Сохраняем первый экземпляр для отчета
             if group['first_issue'] is None:
@@ -765,19 +1073,15 @@ class EnhancedPDFAccessibilityAnalyzer:
         Группирует проблемы по текстовым паттернам
         Возвращает словарь: {текст_паттерн: {страницы: [], проблемы: [], символы: 0, типы: set()}}
         """
-        text_groups = defaultdict(lambda: {
-            'pages': set(),
-            'issues': [],
-            'total_words': 0,
-            'issue_types': set(),
-            'severities': defaultdict(int),
-            'descriptions': set(),
-            'font_info': set()
-        })
+        text_groups = defaultdict(_new_pattern_group)
 
         for issue in issues:
+            # Нормализация только укорачивает текст - короткие отбрасываем сразу
+            if len(issue.text) < 5:
+                continue
+
             # Нормализуем текст для группировки - убираем дубли
-            text_key = self.normalize_text_for_grouping(issue.text)
+            text_key = issue.normalized_text or self.normalize_text_for_grouping(issue.text)
 
             # Пропускаем слишком короткие или бессмысленные тексты
             if len(text_key) < 5:
@@ -790,10 +1094,10 @@ class EnhancedPDFAccessibilityAnalyzer:
             group = text_groups[text_key]
             group['pages'].add(issue.page)
             group['issues'].append(issue)
-            group['total_words'] += self.count_words(text_key)  # Подсчитываем слова
             group['issue_types'].add(issue.issue_type)
             group['severities'][issue.severity] += 1
-            group['descriptions'].add(issue.description[:100])  # Первые 100 символов описания
+            if not group['description']:
+                group['description'] = issue.description[:100]  # Первые 100 символов описания
 
             # Информация о шрифте
             if issue.font_name and issue.font_size:
@@ -808,15 +1112,83 @@ class EnhancedPDFAccessibilityAnalyzer:
                 data['pages_sorted'] = sorted(data['pages'])
                 data['total_pages'] = len(data['pages'])
                 data['total_issues'] = len(data['issues'])
+                # Текст у всех проблем группы один - слова считаем один раз
+                data['total_words'] = self.count_words(text_key) * data['total_issues']
                 filtered_groups[text_key] = data
 
         return filtered_groups
 
+    def invalidate_caches(self):
+        """
+        Сбрасывает все кэшированные представления issues и color_issues
+        (статистику и готовые разделы отчета). Вызывается
+        в analyze(); при ручном изменении issues вызывать самостоятельно
+        """
+        self._stats = None
+        self._report_cache.clear()
+
+    @property
+    def issues_by_type(self) -> Dict[str, List[AccessibilityIssue]]:
+        """
+        Проблемы, сгруппированные по типу (строятся в compute_all_stats
+        вместе с остальной статистикой и так же сбрасываются)
+        """
+        return self.compute_all_stats()['issues_by_type']
+
+    def compute_all_stats(self) -> Dict[str, Any]:
+        """
+        Собирает все группировки проблем за один проход по issues:
+        плоские счетчики с ключами страница, (страница, серьезность),
+        (страница, тип) и (тип, серьезность, текст), страницы и списки
+        проблем по типу, набор уникальных текстов. Результат общий для
+        всех отчетов и итоговой статистики и строится заново только после
+        invalidate_caches (его вызывает analyze)
+        """
+        if self._stats is not None:
+            return self._stats
+
+        page_places = defaultdict(int)
+        page_words = defaultdict(int)
+        page_severity = defaultdict(int)
+        page_type_places = defaultdict(int)
+        page_type_words = defaultdict(int)
+        places_by_key = defaultdict(int)
+        pages_by_type = defaultdict(set)
+        issues_by_type = defaultdict(list)
+        unique_texts = set()
+
+        for issue in self.issues:
+            word_count = self.count_words(issue.text)
+            page_type = (issue.page, issue.issue_type)
+            page_places[issue.page] += 1
+            page_words[issue.page] += word_count
+            page_severity[(issue.page, issue.severity)] += 1
+            page_type_places[page_type] += 1
+            page_type_words[page_type] += word_count
+            places_by_key[(issue.issue_type, issue.severity, issue.text)] += 1
+            pages_by_type[issue.issue_type].add(issue.page)
+            issues_by_type[issue.issue_type].append(issue)
+            unique_texts.add(self.remove_duplicate_chars(issue.text)[:100])  # Первые 100 символов
+
+        stats = {
+            'page_places': page_places,
+            'page_words': page_words,
+            'page_severity': page_severity,
+            'page_type_places': page_type_places,
+            'page_type_words': page_type_words,
+            'places_by_key': places_by_key,
+            'pages_by_type': pages_by_type,
+            'issues_by_type': issues_by_type,
+            'unique_texts': unique_texts
+        }
+        self._stats = stats
+        return stats
+
     def generate_text_pattern_report(self, issues_by_type: Dict[str, List[AccessibilityIssue]]) -> str:
         """Генерирует отчет по текстовым паттернам"""
 
-        report = "\n📋 ГРУППИРОВКА ПО ПОВТОРЯЮЩИМСЯ ТЕКСТАМ:\n"
-        report += "=" * 80 + "\n"
+        parts = ["\n📋 ГРУППИРОВКА ПО ПОВТОРЯЮЩИМСЯ ТЕКСТАМ:\n"]
+        parts.append("=" * 80 + "\n")
 
         all_pattern_reports = []
 
@@ -830,18 +1202,18 @@ class EnhancedPDFAccessibilityAnalyzer:
             if not text_groups:
                 continue
 
-            type_report = f"\n🔍 {issue_type.upper()} - повторяющиеся тексты:\n"
-            type_report += "-" * 60 + "\n"
+            type_parts = [f"\n🔍 {issue_type.upper()} - повторяющиеся тексты:\n"]
+            type_parts.append("-" * 60 + "\n")
 
-            # Сортируем группы по количеству страниц и проблем
-            sorted_groups = sorted(
+            # Топ-10 групп по количеству страниц и проблем
+            sorted_groups = heapq.nlargest(
+                10,
                 text_groups.items(),
-                key=lambda x: (len(x[1]['pages']), len(x[1]['issues'])),
-                reverse=True
+                key=lambda x: (x[1]['total_pages'], x[1]['total_issues'])
             )
 
-            for i, (text_pattern, data) in enumerate(sorted_groups[:10], 1):  # Показываем топ-10
-                type_report += f"\n{i}. Текст: \"{text_pattern}\"\n"
+            for i, (text_pattern, data) in enumerate(sorted_groups, 1):
+                type_parts.append(f"\n{i}. Текст: \"{text_pattern}\"\n")
 
                 # Страницы, где встречается
                 pages_list = data['pages_sorted']
@@ -850,151 +1222,145 @@ class EnhancedPDFAccessibilityAnalyzer:
                 else:
                     pages_str = f"{pages_list[0]}-{pages_list[-1]} (всего {len(pages_list)} страниц)"
 
-                type_report += f"   📄 Встречается на страницах: {pages_str}\n"
-                type_report += f"   📊 Статистика: {data['total_issues']} мест, {data['total_words']:,} слов\n"
+                type_parts.append(f"   📄 Встречается на страницах: {pages_str}\n")
+                type_parts.append(f"   📊 Статистика: {data['total_issues']} мест, {data['total_words']:,} слов\n")
 
                 # Серьезность
                 severity_info = []
                 for severity, count in data['severities'].items():
-                    icon = '🔴' if severity == 'high' else ('🟡' if severity == 'medium' else '🟢')
+                    icon = self.SEVERITY_ICONS[severity]
                     severity_info.append(f"{icon}{count}")
 
                 if severity_info:
-                    type_report += f"   ⚠️  Серьезность: {' '.join(severity_info)}\n"
+                    type_parts.append(f"   ⚠️  Серьезность: {' '.join(severity_info)}\n")
 
                 # Информация о шрифтах
                 if data['font_info']:
                     fonts = list(data['font_info'])[:3]  # Показываем до 3 шрифтов
                     if len(fonts) == 1:
-                        type_report += f"   🔤 Шрифт: {fonts[0]}\n"
+                        type_parts.append(f"   🔤 Шрифт: {fonts[0]}\n")
                     else:
-                        type_report += f"   🔤 Шрифты: {', '.join(fonts)}\n"
+                        type_parts.append(f"   🔤 Шрифты: {', '.join(fonts)}\n")
 
-                # Типичное описание проблемы
-                if data['descriptions']:
-                    # Берем самое частое или первое описание
-                    desc = list(data['descriptions'])[0]
+                # Типичное описание проблемы (первое в группе)
+                if data['description']:
+                    desc = data['description']
                     if len(desc) > 100:
                         desc = desc[:97] + "..."
-                    type_report += f"   📝 Проблема: {desc}\n"
+                    type_parts.append(f"   📝 Проблема: {desc}\n")
 
-            all_pattern_reports.append(type_report)
+            all_pattern_reports.append("".join(type_parts))
 
         if not all_pattern_reports:
-            report += "\n⚠️  Повторяющихся текстовых паттернов не обнаружено\n"
+            parts.append("\n⚠️  Повторяющихся текстовых паттернов не обнаружено\n")
         else:
-            report += "\n".join(all_pattern_reports)
+            parts.append("\n".join(all_pattern_reports))
 
-        return report
+        return "".join(parts)
 
     def generate_color_report_improved(self) -> str:
         """Генерирует улучшенный отчет по проблемным цветам с группировкой"""
         if not self.color_issues:
             return ""
 
-        report = "\n🎨 ОТЧЕТ ПО ПРОБЛЕМНЫМ ЦВЕТАМ:\n"
-        report += "=" * 80 + "\n\n"
+        cached = self._report_cache.get('color')
+        if cached is not None:
+            return cached
 
-        # Группируем по цветам и тексту
-        color_text_groups = defaultdict(lambda: defaultdict(lambda: {
-            'pages': defaultdict(int),
-            'total_count': 0,
-            'issues': [],
-            'contrasts': []
-        }))
+        parts = ["\n🎨 ОТЧЕТ ПО ПРОБЛЕМНЫМ ЦВЕТАМ:\n"]
+        parts.append("=" * 80 + "\n\n")
+
+        # Группируем по паре (цвет, текст) - один поиск в словаре на проблему
+        groups = defaultdict(_new_color_text_group)
 
         for issue in self.color_issues:
-            # Нормализуем текст
             if 'full_text' in issue:
-                normalized_text = self.normalize_text_for_grouping(issue['full_text'])
+                raw_text = issue['full_text']
             elif 'text_sample' in issue:
-                normalized_text = self.normalize_text_for_grouping(issue['text_sample'])
+                raw_text = issue['text_sample']
             else:
                 continue
 
+            # Нормализация только укорачивает текст - короткие отбрасываем сразу
+            if len(raw_text) < 5:
+                continue
+
+            # Нормализуем текст
+            normalized_text = self.normalize_text_for_grouping(raw_text)
             if len(normalized_text) < 5:
                 continue
 
-            color_name = issue['color_name']
-            color_text_groups[color_name][normalized_text]['pages'][issue['page']] += 1
-            color_text_groups[color_name][normalized_text]['total_count'] += 1
-            color_text_groups[color_name][normalized_text]['issues'].append(issue)
-            color_text_groups[color_name][normalized_text]['contrasts'].append(issue['contrast'])
+            group = groups[(issue['color_name'], normalized_text)]
+            group['pages'][issue['page']] += 1
+            group['total_count'] += 1
+            group['issues'].append(issue)
+            group['contrasts'].append(issue['contrast'])
+
+        # Раскладываем группы по цветам для вывода, попутно считая случаи по цвету
+        color_text_groups = defaultdict(dict)
+        color_totals = defaultdict(int)
+        for (color_name, normalized_text), data in groups.items():
+            color_text_groups[color_name][normalized_text] = data
+            color_totals[color_name] += data['total_count']
 
         for color_name, text_groups in sorted(color_text_groups.items()):
-            total_issues = sum(len(data['issues']) for data in text_groups.values())
+            total_issues = color_totals[color_name]
             total_texts = len(text_groups)
 
-            report += f"\n{color_name.upper()} (всего {total_issues} случаев, {total_texts} уникальных текстов):\n"
-            report += "-" * 60 + "\n"
+            parts.append(f"\n{color_name.upper()} (всего {total_issues} случаев, {total_texts} уникальных текстов):\n")
+            parts.append("-" * 60 + "\n")
 
-            # Сортируем тексты по частоте встречаемости
-            sorted_texts = sorted(
+            # Топ-10 текстов по частоте встречаемости
+            sorted_texts = heapq.nlargest(
+                10,
                 text_groups.items(),
-                key=lambda x: (x[1]['total_count'], len(x[1]['pages'])),
-                reverse=True
-            )[:10]  # Показываем топ-10
+                key=lambda x: (x[1]['total_count'], len(x[1]['pages']))
+            )
 
             for i, (text, data) in enumerate(sorted_texts, 1):
                 # Обрезаем длинный текст
-                text_preview = text[:60] + ("..." if len(text) > 60 else "")
+                text_preview = self.truncate_text(text, 60)
 
-                # Собираем информацию о страницах
-                pages_list = list(data['pages'].keys())
-                if len(pages_list) <= 5:
-                    pages_str = ", ".join(str(p) for p in sorted(pages_list))
+                # Собираем информацию о страницах (для длинного списка нужна только первая)
+                pages = data['pages']
+                if len(pages) <= 5:
+                    pages_str = ", ".join(str(p) for p in sorted(pages))
                     pages_info = f"на стр. {pages_str}"
                 else:
-                    pages_info = f"на {len(pages_list)} стр. (первая: стр. {sorted(pages_list)[0]})"
+                    pages_info = f"на {len(pages)} стр. (первая: стр. {min(pages)})"
 
                 # Средняя контрастность
                 avg_contrast = sum(data['contrasts']) / len(data['contrasts'])
 
-                report += f"\n{i}. Текст: \"{text_preview}\"\n"
-                report += f"   📊 Встречается: {data['total_count']} раз {pages_info}\n"
-                report += f"   🎨 Средняя контрастность: {avg_contrast:.1f}:1"
+                parts.append(f"\n{i}. Текст: \"{text_preview}\"\n")
+                parts.append(f"   📊 Встречается: {data['total_count']} раз {pages_info}\n")
+                parts.append(f"   🎨 Средняя контрастность: {avg_contrast:.1f}:1")
 
                 # Статистика по контрастности
                 below_45 = sum(1 for c in data['contrasts'] if c < 4.5)
 
                 if below_45 > 0:
                     percentage = (below_45 / len(data['contrasts'])) * 100
-                    report += f" (ниже 4.5:1 - {below_45} случаев, {percentage:.0f}%)"
+                    parts.append(f" (ниже 4.5:1 - {below_45} случаев, {percentage:.0f}%)")
 
-                report += "\n"
+                parts.append("\n")
 
                 # Информация о первом экземпляре
                 if data['issues']:
                     first_issue = data['issues'][0]
                     if 'font_size' in first_issue:
-                        report += f"   📏 Размер шрифта: {first_issue['font_size']:.1f}pt"
+                        parts.append(f"   📏 Размер шрифта: {first_issue['font_size']:.1f}pt")
                         if first_issue.get('is_large', False):
-                            report += " (крупный текст)"
-                        report += "\n"
+                            parts.append(" (крупный текст)")
+                        parts.append("\n")
 
         # Рекомендации по цветам
-        report += "\n💡 РЕКОМЕНДАЦИИ ПО ИСПРАВЛЕНИЮ ЦВЕТОВ:\n"
-        report += "-" * 60 + "\n"
-        report += "1. Зеленый текст на белом фоне:\n"
-        report += "   • Проблема: светло-зеленый, салатовый (контрастность ~2.9-3.5:1)\n"
-        report += "   • Решение: используйте темно-зеленый (#006400, #228B22)\n"
-        report += "   • Результат: контрастность ~6.5:1 ✓\n\n"
-
-        report += "2. Серый текст на белом фоне:\n"
-        report += "   • Проблема: средне-серый (контрастность ~3.9:1)\n"
-        report += "   • Решение: используйте темно-серый (#333333) или черный (#000000)\n"
-        report += "   • Результат: контрастность 12.6:1 или 21:1 ✓\n\n"
-
-        report += "3. Желтый/оранжевый текст:\n"
-        report += "   • Проблема: яркий желтый/оранжевый (контрастность ~3.0:1)\n"
-        report += "   • Решение: используйте темные оттенки или замените на черный\n\n"
-
-        report += "4. Лучшие сочетания для доступности:\n"
-        report += "   • Черный (#000000) на белом: 21:1 ✓\n"
-        report += "   • Темно-серый (#333333) на белом: 12.6:1 ✓\n"
-        report += "   • Темно-синий (#000066) на белом: 8.6:1 ✓\n"
-        report += "   • Темно-зеленый (#006400) на белом: 6.5:1 ✓\n"
+        parts.append("\n💡 РЕКОМЕНДАЦИИ ПО ИСПРАВЛЕНИЮ ЦВЕТОВ:\n")
+        parts.append("-" * 60 + "\n")
+        parts.append(self.COLOR_RECOMMENDATIONS)
 
+        report = "".join(parts)
+        self._report_cache['color'] = report
         return report
 
     def generate_summary_table(self, issues: List[AccessibilityIssue]) -> str:
@@ -1005,17 +1371,13 @@ class EnhancedPDFAccessibilityAnalyzer:
         # Группируем проблемы
         text_groups = self.group_issues_by_text_and_page(issues)
 
-        report = "\n📋 СВОДНАЯ ТАБЛИЦА ПРОБЛЕМ (ГРУППИРОВКА ПО ТЕКСТУ):\n"
-        report += "=" * 80 + "\n\n"
-        report += "№ | Текст | Проблема | Страницы | Количество | Серьезность\n"
-        report += "-" * 80 + "\n"
+        parts = ["\n📋 СВОДНАЯ ТАБЛИЦА ПРОБЛЕМ (ГРУППИРОВКА ПО ТЕКСТУ):\n"]
+        parts.append("=" * 80 + "\n\n")
+        parts.append("№ | Текст | Проблема | Страницы | Количество | Серьезность\n")
+        parts.append("-" * 80 + "\n")
 
-        # Сортируем по количеству встречаемости
-        sorted_groups = sorted(
-            text_groups.items(),
-            key=lambda x: x[1]['total_count'],
-            reverse=True
-        )[:50]  # Показываем топ-50
+        # Топ-50 по количеству встречаемости
+        sorted_groups = heapq.nlargest(50, text_groups.items(), key=lambda x: x[1]['total_count'])
 
         for i, (text, data) in enumerate(sorted_groups, 1):
             first_issue = data['first_issue']
@@ -1023,47 +1385,55 @@ class EnhancedPDFAccessibilityAnalyzer:
                 continue
 
             # Обрезаем текст
-            text_preview = text[:40] + ("..." if len(text) > 40 else "")
+            text_preview = self.truncate_text(text, 40)
 
             # Описание проблемы
-            description = list(data['descriptions'])[0] if data['descriptions'] else ""
-            desc_preview = description[:50] + ("..." if len(description) > 50 else "")
+            description = first_issue.description
+            desc_preview = self.truncate_text(description, 50)
 
             # Информация о страницах
-            pages_list = list(data['pages'].keys())
-            if len(pages_list) <= 3:
-                pages_str = ", ".join(str(p) for p in sorted(pages_list))
+            pages = data['pages']
+            if len(pages) <= 3:
+                pages_str = ", ".join(str(p) for p in sorted(pages))
             else:
-                pages_str = f"{pages_list[0]}, ..., {pages_list[-1]} ({len(pages_list)} стр.)"
+                # Первая и последняя страницы в порядке появления, без копии ключей
+                pages_str = f"{next(iter(pages))}, ..., {next(reversed(pages))} ({len(pages)} стр.)"
 
             # Серьезность с иконкой
-            severity_icon = '🔴' if first_issue.severity == 'high' else (
-                '🟡' if first_issue.severity == 'medium' else '🟢')
+            severity_icon = self.SEVERITY_ICONS[first_issue.severity]
 
-            report += f"{i:2d} | {text_preview:42s} | {desc_preview:48s} | {pages_str:15s} | {data['total_count']:4d} раз | {severity_icon} {first_issue.severity}\n"
+            parts.append(f"{i:2d} | {text_preview:42s} | {desc_preview:48s} | {pages_str:15s} | {data['total_count']:4d} раз | {severity_icon} {first_issue.severity}\n")
 
-        return report
+        return "".join(parts)
 
     def analyze(self) -> List[AccessibilityIssue]:
         """Основной метод анализа PDF"""
         print(f"🔍 Начинаю улучшенный анализ доступности PDF: {self.pdf_path}")
+        # Статистика прошлого анализа к новым issues не относится
+        self.invalidate_caches()
 
         try:
-            with pdfplumber.open(self.pdf_path) as pdf:
-                total_pages = len(pdf.pages)
+            with self.open_document() as pdf:
+                pages = self.get_document_pages(pdf)
+                total_pages = len(pages)
                 print(f"📄 Найдено страниц: {total_pages}")
 
-                for page_num, page in enumerate(pdf.pages, 1):
-                    print(f"  Анализ страницы {page_num}/{total_pages}...", end='\r')
+                if self.workers > 1 and total_pages > 1:
+                    self.analyze_parallel(total_pages)
+                else:
+                    for page_num, page in enumerate(pages, 1):
+                        print(f"  Анализ страницы {page_num}/{total_pages}...", end='\r')
 
-                    # Очищаем кэш для новой страницы
-                    self.line_cache.clear()
-                    self.full_text_cache.clear()
+                        page_issues = self.analyze_page(page_num, page)
+                        self.issues.extend(page_issues)
 
-                    page_issues = self.analyze_page(page_num, page)
-                    self.issues.extend(page_issues)
+                # Текст для группировки считаем один раз на проблему,
+                # отчеты дальше берут готовый
+                for issue in self.issues:
+                    issue.normalized_text = self.normalize_text_for_grouping(issue.text)
 
                 print(f"\n✅ Анализ завершен. Найдено проблем: {len(self.issues)}")
+                self.print_warnings()
 
         except Exception as e:
             print(f"\n❌ Ошибка при анализе PDF: {e}")
@@ -1072,59 +1442,70 @@ class EnhancedPDFAccessibilityAnalyzer:
 
         return self.issues
 
+    def analyze_parallel(self, total_pages: int):
+        """
+        Анализирует страницы в пуле процессов: страницы независимы,
+        каждый процесс открывает свою копию PDF. Результаты собираются
+        в порядке страниц, как при последовательном анализе
+        """
+        # md5 файла нужен только для путей кэша
+        file_fingerprint = self.get_file_fingerprint() if self.chars_cache_dir else None
+        init_args = (self.pdf_path, self.backend, self.chars_cache_dir, file_fingerprint, self.debug)
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_page_worker,
+                                 initargs=init_args) as executor:
+            results = executor.map(_analyze_one_page, range(1, total_pages + 1))
+
+            for page_num, (page_issues, color_issues, warnings, colors_found) in enumerate(results, 1):
+                print(f"  Анализ страницы {page_num}/{total_pages}...", end='\r')
+                self.issues.extend(page_issues)
+                self.color_issues.extend(color_issues)
+                self.problematic_colors_found.extend(colors_found)
+                for message, count in warnings.items():
+                    self.warnings[message] += count
+
     def generate_summary_report(self) -> str:
         """Генерирует краткий отчет с основной статистикой"""
         summary = self.group_and_summarize_issues_improved()
         
-        report = "📊 КРАТКИЙ ОТЧЕТ ПО ДОСТУПНОСТИ PDF\n"
-        report += "=" * 60 + "\n\n"
-        report += f"📄 Документ: {os.path.basename(self.pdf_path)}\n"
-        report += f"📈 Всего проблем: {summary['overall']['total_places']:,} мест\n"
-        report += f"📊 Всего слов проблемного текста: {summary['overall']['total_words']:,}\n"
-        report += f"📑 Затронуто страниц: {len(summary['overall']['pages_with_issues'])}\n\n"
+        parts = ["📊 КРАТКИЙ ОТЧЕТ ПО ДОСТУПНОСТИ PDF\n"]
+        parts.append("=" * 60 + "\n\n")
+        parts.append(f"📄 Документ: {os.path.basename(self.pdf_path)}\n")
+        parts.append(f"📈 Всего проблем: {summary['overall']['total_places']:,} мест\n")
+        parts.append(f"📊 Всего слов проблемного текста: {summary['overall']['total_words']:,}\n")
+        parts.append(f"📑 Затронуто страниц: {len(summary['overall']['pages_with_issues'])}\n\n")
         
         # Статистика по серьезности
-        report += "📊 СТАТИСТИКА ПО СЕРЬЕЗНОСТИ:\n"
-        report += "-" * 40 + "\n"
-        for severity in ['high', 'medium', 'low']:
+        parts.append("📊 СТАТИСТИКА ПО СЕРЬЕЗНОСТИ:\n")
+        parts.append("-" * 40 + "\n")
+        for severity in self.SEVERITY_ORDER:
             if severity in summary['by_severity']:
                 group = summary['by_severity'][severity]
-                icon = '🔴' if severity == 'high' else ('🟡' if severity == 'medium' else '🟢')
-                report += f"{icon} {severity.upper()}: {group['places']:,} мест ({group['words']:,} слов)\n"
+                icon = self.SEVERITY_ICONS[severity]
+                parts.append(f"{icon} {severity.upper()}: {group['places']:,} мест ({group['words']:,} слов)\n")
         
         # Топ-3 типа проблем
-        report += "\n📋 ОСНОВНЫЕ ТИПЫ ПРОБЛЕМ:\n"
-        report += "-" * 40 + "\n"
-        type_items = sorted(
-            summary['by_type'].items(),
-            key=lambda x: x[1]['total_places'],
-            reverse=True
-        )[:3]
+        parts.append("\n📋 ОСНОВНЫЕ ТИПЫ ПРОБЛЕМ:\n")
+        parts.append("-" * 40 + "\n")
+        type_items = heapq.nlargest(3, summary['by_type'].items(), key=lambda x: x[1]['total_places'])
         
         for issue_type, type_data in type_items:
-            report += f"• {issue_type}: {type_data['total_places']:,} мест ({type_data['total_words']:,} слов)\n"
+            parts.append(f"• {issue_type}: {type_data['total_places']:,} мест ({type_data['total_words']:,} слов)\n")
         
-        return report
+        return "".join(parts)
 
     def generate_json_report(self) -> Dict[str, Any]:
         """Генерирует отчет в формате JSON"""
         summary = self.group_and_summarize_issues_improved()
         
-        # Конвертируем issues в словари
-        issues_dict = [asdict(issue) for issue in self.issues]
-        
-        # Конвертируем sets в lists для JSON
-        def convert_sets(obj):
-            if isinstance(obj, set):
-                return sorted(list(obj))
-            elif isinstance(obj, dict):
-                return {k: convert_sets(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_sets(item) for item in obj]
-            return obj
-        
-        convert_sets(summary)  # Подготовка для будущего использования
-        
+        # Конвертируем в словари только попадающие в отчет issues;
+        # normalized_text - внутренний ключ группировки, в отчет не идет
+        issues_dict = []
+        for issue in islice(self.issues, 1000):
+            issue_dict = asdict(issue)
+            del issue_dict['normalized_text']
+            issues_dict.append(issue_dict)
+
         report = {
             'document': os.path.basename(self.pdf_path),
             'document_path': self.pdf_path,
@@ -1149,7 +1530,7 @@ class EnhancedPDFAccessibilityAnalyzer:
                     for issue_type, data in summary['by_type'].items()
                 }
             },
-            'issues': issues_dict[:1000],  # Ограничиваем для JSON (первые 1000)
+            'issues': issues_dict,  # Ограничиваем для JSON (первые 1000)
             'color_issues': self.color_issues[:100]  # Ограничиваем цветовые проблемы
         }
         
@@ -1159,16 +1540,16 @@ class EnhancedPDFAccessibilityAnalyzer:
         """Генерирует отчет только со статистикой без деталей"""
         summary = self.group_and_summarize_issues_improved()
         
-        report = "📊 СТАТИСТИКА ПО ДОСТУПНОСТИ PDF\n"
-        report += "=" * 60 + "\n\n"
-        report += f"📄 Документ: {os.path.basename(self.pdf_path)}\n"
-        report += f"📈 Всего проблем: {summary['overall']['total_places']:,} мест\n"
-        report += f"📊 Всего слов проблемного текста: {summary['overall']['total_words']:,}\n"
-        report += f"📑 Затронуто страниц: {len(summary['overall']['pages_with_issues'])}\n\n"
+        parts = ["📊 СТАТИСТИКА ПО ДОСТУПНОСТИ PDF\n"]
+        parts.append("=" * 60 + "\n\n")
+        parts.append(f"📄 Документ: {os.path.basename(self.pdf_path)}\n")
+        parts.append(f"📈 Всего проблем: {summary['overall']['total_places']:,} мест\n")
+        parts.append(f"📊 Всего слов проблемного текста: {summary['overall']['total_words']:,}\n")
+        parts.append(f"📑 Затронуто страниц: {len(summary['overall']['pages_with_issues'])}\n\n")
         
         # Детальная статистика по типам и серьезности
-        report += "📋 РАСПРЕДЕЛЕНИЕ ПО ТИПАМ И СЕРЬЕЗНОСТИ:\n"
-        report += "-" * 60 + "\n"
+        parts.append("📋 РАСПРЕДЕЛЕНИЕ ПО ТИПАМ И СЕРЬЕЗНОСТИ:\n")
+        parts.append("-" * 60 + "\n")
         
         for issue_type, severity_data in sorted(
             summary['by_type_severity'].items(),
@@ -1179,15 +1560,15 @@ class EnhancedPDFAccessibilityAnalyzer:
             if total == 0:
                 continue
             
-            report += f"\n{issue_type}:\n"
-            for severity in ['high', 'medium', 'low']:
+            parts.append(f"\n{issue_type}:\n")
+            for severity in self.SEVERITY_ORDER:
                 if severity_data[severity]['places'] > 0:
-                    icon = '🔴' if severity == 'high' else ('🟡' if severity == 'medium' else '🟢')
+                    icon = self.SEVERITY_ICONS[severity]
                     places = severity_data[severity]['places']
                     pct = (places / total) * 100
-                    report += f"  {icon} {severity.capitalize()}: {places:,} мест ({pct:.1f}%)\n"
+                    parts.append(f"  {icon} {severity.capitalize()}: {places:,} мест ({pct:.1f}%)\n")
         
-        return report
+        return "".join(parts)
 
     def generate_improved_report(self, output_file: str = None,
                                  create_screenshots: bool = False,
@@ -1218,8 +1599,8 @@ class EnhancedPDFAccessibilityAnalyzer:
                 with open(output_file, 'w', encoding='utf-8') as f:
                     f.write(report)
                 print(f"\n📁 Краткий отчет сохранен в файл: {output_file}")
-            print("\n" + "=" * 60)
-            print(report)
+            sys.stdout.writelines(("\n" + "=" * 60 + "\n", report, "\n"))
+            sys.stdout.flush()
             return report
         
         elif report_format == "statistics":
@@ -1228,13 +1609,16 @@ class EnhancedPDFAccessibilityAnalyzer:
                 with open(output_file, 'w', encoding='utf-8') as f:
                     f.write(report)
                 print(f"\n📁 Статистический отчет сохранен в файл: {output_file}")
-            print("\n" + "=" * 60)
-            print(report)
+            sys.stdout.writelines(("\n" + "=" * 60 + "\n", report, "\n"))
+            sys.stdout.flush()
             return report
         
         elif report_format == "json":
             report_dict = self.generate_json_report()
-            report_json = json.dumps(report_dict, ensure_ascii=False, indent=2)
+            if orjson is not None:
+                report_json = orjson.dumps(report_dict, option=orjson.OPT_INDENT_2).decode('utf-8')
+            else:
+                report_json = json.dumps(report_dict, ensure_ascii=False, indent=2)
             if output_file:
                 with open(output_file, 'w', encoding='utf-8') as f:
                     f.write(report_json)
@@ -1248,44 +1632,38 @@ class EnhancedPDFAccessibilityAnalyzer:
         # Группируем с улучшенной структурой
         summary = self.group_and_summarize_issues_improved()
 
-        # Подсчитываем уникальные места
-        unique_locations = set()
-        for issue in self.issues:
-            location_key = f"{issue.page}_{issue.x:.1f}_{issue.y:.1f}_{self.remove_duplicate_chars(issue.text[:50])}"
-            unique_locations.add(location_key)
-
-        report = "📊 УЛУЧШЕННЫЙ ОТЧЕТ ПО ДОСТУПНОСТИ PDF\n"
-        report += "=" * 80 + "\n\n"
-        report += f"📄 Документ: {self.pdf_path}\n"
-        report += f"📈 Всего проблем: {summary['overall']['total_places']:,} мест\n"
-        report += f"📊 Всего слов проблемного текста: {summary['overall']['total_words']:,}\n"
-        report += f"📑 Затронуто страниц: {len(summary['overall']['pages_with_issues'])}\n"
+        parts = ["📊 УЛУЧШЕННЫЙ ОТЧЕТ ПО ДОСТУПНОСТИ PDF\n"]
+        parts.append("=" * 80 + "\n\n")
+        parts.append(f"📄 Документ: {self.pdf_path}\n")
+        parts.append(f"📈 Всего проблем: {summary['overall']['total_places']:,} мест\n")
+        parts.append(f"📊 Всего слов проблемного текста: {summary['overall']['total_words']:,}\n")
+        parts.append(f"📑 Затронуто страниц: {len(summary['overall']['pages_with_issues'])}\n")
 
         if not self.issues:
-            report += "\n✅ Проблем с доступностью не обнаружено!\n"
-            report += "Документ соответствует основным требованиям WCAG 2.1.\n"
+            parts.append("\n✅ Проблем с доступностью не обнаружено!\n")
+            parts.append("Документ соответствует основным требованиям WCAG 2.1.\n")
         else:
             # ==================== СВОДНАЯ СТАТИСТИКА ====================
-            report += "\n📊 СВОДНАЯ СТАТИСТИКА:\n"
-            report += "=" * 40 + "\n"
+            parts.append("\n📊 СВОДНАЯ СТАТИСТИКА:\n")
+            parts.append("=" * 40 + "\n")
 
-            for severity in ['high', 'medium', 'low']:
+            for severity in self.SEVERITY_ORDER:
                 if severity in summary['by_severity']:
                     group = summary['by_severity'][severity]
-                    icon = '🔴' if severity == 'high' else ('🟡' if severity == 'medium' else '🟢')
+                    icon = self.SEVERITY_ICONS[severity]
 
-                    report += f"\n{icon} {severity.upper()}: {group['places']:,} мест ({group['words']:,} слов)\n"
+                    parts.append(f"\n{icon} {severity.upper()}: {group['places']:,} мест ({group['words']:,} слов)\n")
 
                     # Распределение по типам внутри серьезности
                     if group['types']:
                         for issue_type, type_data in sorted(group['types'].items(),
                                                             key=lambda x: x[1]['places'],
                                                             reverse=True):
-                            report += f"   • {issue_type}: {type_data['places']:,} мест ({type_data['words']:,} слов)\n"
+                            parts.append(f"   • {issue_type}: {type_data['places']:,} мест ({type_data['words']:,} слов)\n")
 
             # ==================== РАСПРЕДЕЛЕНИЕ ПО ТИПАМ ====================
-            report += "\n\n📋 РАСПРЕДЕЛЕНИЕ ПО ТИПАМ ПРОБЛЕМ (с детализацией по серьезности):\n"
-            report += "=" * 60 + "\n"
+            parts.append("\n\n📋 РАСПРЕДЕЛЕНИЕ ПО ТИПАМ ПРОБЛЕМ (с детализацией по серьезности):\n")
+            parts.append("=" * 60 + "\n")
 
             # Сортируем типы по общему количеству мест
             type_items = sorted(
@@ -1305,50 +1683,43 @@ class EnhancedPDFAccessibilityAnalyzer:
                 if total_places == 0:
                     continue
 
-                report += f"\n{issue_type.upper()}:\n"
-                report += f"  Всего: {total_places:,} мест ({total_words:,} слов)\n"
+                parts.append(f"\n{issue_type.upper()}:\n")
+                parts.append(f"  Всего: {total_places:,} мест ({total_words:,} слов)\n")
 
                 # Детализация по серьезности
-                for severity in ['high', 'medium', 'low']:
+                for severity in self.SEVERITY_ORDER:
                     if severity_data[severity]['places'] > 0:
-                        icon = '🔴' if severity == 'high' else ('🟡' if severity == 'medium' else '🟢')
+                        icon = self.SEVERITY_ICONS[severity]
                         places = severity_data[severity]['places']
                         words = severity_data[severity]['words']
                         percentage = (places / total_places) * 100 if total_places > 0 else 0
 
-                        report += f"  {icon} {severity.capitalize()}: {places:,} мест ({words:,} слов, {percentage:.1f}%)\n"
+                        parts.append(f"  {icon} {severity.capitalize()}: {places:,} мест ({words:,} слов, {percentage:.1f}%)\n")
 
             # ==================== ДЕТАЛЬНЫЙ АНАЛИЗ КАЖДОГО ТИПА ====================
-            report += "\n\n🔍 ДЕТАЛЬНЫЙ АНАЛИЗ ПО ТИПАМ ПРОБЛЕМ:\n"
-            report += "=" * 60 + "\n"
-
-            issues_by_type = defaultdict(list)
-            for issue in self.issues:
-                issues_by_type[issue.issue_type].append(issue)
+            parts.append("\n\n🔍 ДЕТАЛЬНЫЙ АНАЛИЗ ПО ТИПАМ ПРОБЛЕМ:\n")
+            parts.append("=" * 60 + "\n")
 
-            for issue_type, type_issues in sorted(issues_by_type.items(),
+            for issue_type, type_issues in sorted(self.issues_by_type.items(),
                                                   key=lambda x: len(x[1]),
                                                   reverse=True):
-                if len(type_issues) < 10:  # Пропускаем редкие типы
-                    continue
+                if len(type_issues) < 10:  # Редкие типы (дальше по убыванию - только реже)
+                    break
 
                 # Статистика по этому типу
                 type_summary = summary['by_type'][issue_type]
 
-                report += f"\n{issue_type.upper()} ({type_summary['total_places']:,} мест):\n"
-                report += "-" * 40 + "\n"
+                parts.append(f"\n{issue_type.upper()} ({type_summary['total_places']:,} мест):\n")
+                parts.append("-" * 40 + "\n")
 
                 # Для проблем с контрастностью используем специальную группировку
                 if issue_type == 'Контрастность':
                     # Группируем по тексту
                     text_groups = self.group_issues_by_text_and_page(type_issues)
 
-                    # Сортируем по частоте встречаемости
-                    sorted_groups = sorted(
-                        text_groups.items(),
-                        key=lambda x: x[1]['total_count'],
-                        reverse=True
-                    )[:20]  # Показываем топ-20 самых частых
+                    # Топ-20 самых частых текстов
+                    sorted_groups = heapq.nlargest(20, text_groups.items(),
+                                                   key=lambda x: x[1]['total_count'])
 
                     for i, (text, group_data) in enumerate(sorted_groups, 1):
                         first_issue = group_data['first_issue']
@@ -1356,161 +1727,132 @@ class EnhancedPDFAccessibilityAnalyzer:
                         pages_count = len(group_data['pages'])
 
                         # Берем пример описания
-                        description = list(group_data['descriptions'])[0] if group_data['descriptions'] else ""
+                        description = first_issue.description
 
                         # Формируем информацию о страницах
                         if pages_count <= 5:
-                            pages_list = list(group_data['pages'].keys())
-                            pages_str = ", ".join(str(p) for p in sorted(pages_list))
+                            pages_str = ", ".join(str(p) for p in sorted(group_data['pages']))
                             pages_info = f"на страницах: {pages_str}"
                         else:
-                            pages_list = sorted(group_data['pages'].keys())
-                            pages_info = f"на {pages_count} страницах (первая: стр. {pages_list[0]})"
+                            pages_info = f"на {pages_count} страницах (первая: стр. {min(group_data['pages'])})"
 
                         # Обрезаем текст для отображения
-                        text_preview = text[:80] + ("..." if len(text) > 80 else "")
+                        text_preview = self.truncate_text(text, 80)
 
-                        report += f"\n{i}. Текст: \"{text_preview}\"\n"
-                        report += f"   📝 Проблема: {description[:100]}\n"
-                        report += f"   📊 Встречается: {total_count} раз {pages_info}\n"
+                        parts.append(f"\n{i}. Текст: \"{text_preview}\"\n")
+                        parts.append(f"   📝 Проблема: {description[:100]}\n")
+                        parts.append(f"   📊 Встречается: {total_count} раз {pages_info}\n")
 
                         if first_issue:
-                            icon = '🔴' if first_issue.severity == 'high' else (
-                                '🟡' if first_issue.severity == 'medium' else '🟢')
-                            report += f"   {icon} Серьезность: {first_issue.severity}\n"
+                            icon = self.SEVERITY_ICONS[first_issue.severity]
+                            parts.append(f"   {icon} Серьезность: {first_issue.severity}\n")
                             if first_issue.font_name:
-                                report += f"   🔤 Шрифт: {first_issue.font_name} ({first_issue.font_size:.1f}pt)\n"
+                                parts.append(f"   🔤 Шрифт: {first_issue.font_name} ({first_issue.font_size:.1f}pt)\n")
                 else:
                     # Для других типов проблем используем старый формат
-                    report += f"📄 Затронуто страниц: {len(type_summary['pages_affected'])}\n"
+                    parts.append(f"📄 Затронуто страниц: {len(type_summary['pages_affected'])}\n")
 
                     # Топ-5 страниц по количеству проблем
-                    page_counts = defaultdict(int)
-                    for issue in type_issues:
-                        page_counts[issue.page] += 1
+                    top_pages = Counter(issue.page for issue in type_issues).most_common(5)
 
-                    if page_counts:
-                        top_pages = sorted(page_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-                        report += f"📊 Самые проблемные страницы:\n"
+                    if top_pages:
+                        parts.append(f"📊 Самые проблемные страницы:\n")
                         for page_num, count in top_pages:
-                            report += f"   • Страница {page_num}: {count:,} мест\n"
+                            parts.append(f"   • Страница {page_num}: {count:,} мест\n")
 
                     # Примеры проблем
-                    report += f"\n🔎 ПРИМЕРЫ ПРОБЛЕМ:\n"
+                    parts.append(f"\n🔎 ПРИМЕРЫ ПРОБЛЕМ:\n")
 
-                    # Берем примеры с разной серьезностью
+                    # Берем по 2 примера каждой серьезности из первых 50 проблем,
+                    # прекращая просмотр, как только все группы заполнены
                     examples_by_severity = {'high': [], 'medium': [], 'low': []}
-                    for issue in type_issues[:50]:
-                        examples_by_severity[issue.severity].append(issue)
+                    for issue in islice(type_issues, 50):
+                        bucket = examples_by_severity[issue.severity]
+                        if len(bucket) < 2:
+                            bucket.append(issue)
+                            if all(len(b) == 2 for b in examples_by_severity.values()):
+                                break
 
                     examples_shown = 0
-                    for severity in ['high', 'medium', 'low']:
-                        for issue in examples_by_severity[severity][:2]:
-                            text_preview = self.remove_duplicate_chars(issue.text)
-                            text_preview = text_preview[:80] + ("..." if len(text_preview) > 80 else "")
-                            icon = '🔴' if severity == 'high' else ('🟡' if severity == 'medium' else '🟢')
-
-                            report += f"\n   {icon} {severity.capitalize()}: {text_preview}\n"
-                            report += f"      📝 {issue.description[:120]}\n"
+                    for severity in self.SEVERITY_ORDER:
+                        for issue in examples_by_severity[severity]:
+                            text_preview = self.truncate_text(self.remove_duplicate_chars(issue.text), 80)
+                            icon = self.SEVERITY_ICONS[severity]
+
+                            parts.append(f"\n   {icon} {severity.capitalize()}: {text_preview}\n")
+                            parts.append(f"      📝 {issue.description[:120]}\n")
                             examples_shown += 1
 
                         if examples_shown >= 6:
                             break
 
             # ==================== ВЫВОД ПО СТРАНИЦАМ ====================
-            report += "\n\n📄 ОБЗОР ПО СТРАНИЦАМ (топ-10 самых проблемных):\n"
-            report += "=" * 60 + "\n"
+            parts.append("\n\n📄 ОБЗОР ПО СТРАНИЦАМ (топ-10 самых проблемных):\n")
+            parts.append("=" * 60 + "\n")
 
-            # Собираем статистику по страницам
-            page_stats = defaultdict(lambda: {
-                'total_places': 0,
-                'total_words': 0,
-                'by_type': defaultdict(lambda: {'places': 0, 'words': 0}),
-                'by_severity': defaultdict(int)
-            })
-
-            for issue in self.issues:
-                page = page_stats[issue.page]
-                word_count = self.count_words(issue.text)
-                page['total_places'] += 1
-                page['total_words'] += word_count
-                page['by_type'][issue.issue_type]['places'] += 1
-                page['by_type'][issue.issue_type]['words'] += word_count
-                page['by_severity'][issue.severity] += 1
-
-            # Сортируем страницы по количеству проблем
-            sorted_pages = sorted(
-                page_stats.items(),
-                key=lambda x: x[1]['total_places'],
-                reverse=True
-            )[:10]  # Только топ-10
+            # Статистика по страницам (общая с итоговой статистикой CLI)
+            stats = self.compute_all_stats()
+            page_places = stats['page_places']
+            page_words = stats['page_words']
+            page_severity = stats['page_severity']
+            page_type_places = stats['page_type_places']
+            page_type_words = stats['page_type_words']
+
+            # Топ-10 страниц по количеству проблем
+            sorted_pages = heapq.nlargest(10, page_places.items(), key=itemgetter(1))
 
-            for page_num, stats in sorted_pages:
-                report += f"\n📄 СТРАНИЦА {page_num}:\n"
-                report += f"   Всего: {stats['total_places']:,} мест ({stats['total_words']:,} слов)\n"
+            for page_num, total_places in sorted_pages:
+                parts.append(f"\n📄 СТРАНИЦА {page_num}:\n")
+                parts.append(f"   Всего: {total_places:,} мест ({page_words[page_num]:,} слов)\n")
 
                 # Распределение по серьезности
                 sev_str = []
-                for sev in ['high', 'medium', 'low']:
-                    if sev in stats['by_severity'] and stats['by_severity'][sev] > 0:
-                        icon = '🔴' if sev == 'high' else ('🟡' if sev == 'medium' else '🟢')
-                        sev_str.append(f"{icon}{stats['by_severity'][sev]}")
+                for sev in self.SEVERITY_ORDER:
+                    count = page_severity.get((page_num, sev), 0)
+                    if count > 0:
+                        icon = self.SEVERITY_ICONS[sev]
+                        sev_str.append(f"{icon}{count}")
 
                 if sev_str:
-                    report += f"   ⚠️  Серьезность: {' '.join(sev_str)}\n"
+                    parts.append(f"   ⚠️  Серьезность: {' '.join(sev_str)}\n")
 
-                # Основные типы проблем
-                type_items = sorted(
-                    stats['by_type'].items(),
-                    key=lambda x: x[1]['places'],
-                    reverse=True
-                )[:3]  # Только топ-3 типа
+                # Основные типы проблем (топ-3)
+                type_items = heapq.nlargest(
+                    3,
+                    ((issue_type, places) for (page, issue_type), places in page_type_places.items()
+                     if page == page_num),
+                    key=itemgetter(1)
+                )
 
-                for issue_type, type_data in type_items:
-                    if type_data['places'] > 0:
-                        report += f"   • {issue_type}: {type_data['places']:,} мест ({type_data['words']:,} слов)\n"
+                for issue_type, places in type_items:
+                    words = page_type_words[(page_num, issue_type)]
+                    parts.append(f"   • {issue_type}: {places:,} мест ({words:,} слов)\n")
 
         # Отчет по проблемным цветам (если есть проблемы с контрастностью)
         if 'Контрастность' in summary['by_type_severity']:
             color_report = self.generate_color_report_improved()
             if color_report:
-                report += color_report
+                parts.append(color_report)
 
         # Добавляем сводную таблицу
-        report += self.generate_summary_table(self.issues)
+        parts.append(self.generate_summary_table(self.issues))
 
         # Рекомендации
-        report += "\n💡 ОБЩИЕ РЕКОМЕНДАЦИИ ПО ИСПРАВЛЕНИЮ:\n"
-        report += "=" * 60 + "\n"
-
-        # Анализируем, какие типы проблем присутствуют
-        issue_types_present = set(summary['by_type_severity'].keys())
-
-        if 'Контрастность' in issue_types_present:
-            report += "1. УВЕЛИЧЬТЕ КОНТРАСТНОСТЬ ТЕКСТА:\n"
-            report += "   • Обычный текст: минимальная контрастность 4.5:1\n"
-            report += "   • Крупный текст (≥18pt или ≥14pt жирный): минимальная контрастность 3.0:1\n"
-            report += "   • Используйте: черный (#000000), темно-серый (#333333), темно-синий (#000066)\n\n"
-
-        if 'Размер шрифта' in issue_types_present:
-            report += "2. УВЕЛИЧЬТЕ РАЗМЕР ШРИФТА:\n"
-            report += "   • Основной текст: минимальный размер 12pt (рекомендуется 14-16pt)\n"
-            report += "   • Заголовки: минимальный размер 14pt (рекомендуется 16-18pt)\n"
-            report += "   • Для слабовидящих: основной текст 16-18pt, заголовки 20-24pt\n\n"
-
-        if 'Читаемость шрифта' in issue_types_present:
-            report += "3. ВЫБЕРИТЕ ЧИТАЕМЫЕ ШРИФТЫ:\n"
-            report += "   • Рекомендуется: Arial, Verdana, Tahoma, Georgia\n"
-            report += "   • Избегайте: декоративных, моноширинных, рукописных шрифтов\n\n"
-
-        report += "📋 СТАНДАРТЫ WCAG 2.1 (Уровень AA):\n"
-        report += "   • Контрастность текста: 4.5:1 (3.0:1 для крупного текста)\n"
-        report += "   • Минимальный размер текста: эффективный визуальный размер 2.5мм\n"
-        report += "   • Использование цвета: не полагаться только на цвет для передачи информации\n"
+        parts.append("\n💡 ОБЩИЕ РЕКОМЕНДАЦИИ ПО ИСПРАВЛЕНИЮ:\n")
+        parts.append("=" * 60 + "\n")
+
+        # Рекомендации только по тем типам проблем, что есть в документе
+        for issue_type, recommendation in self.RECOMMENDATIONS_BY_TYPE:
+            if issue_type in summary['by_type_severity']:
+                parts.append(recommendation)
+
+        parts.append(self.WCAG_STANDARDS)
+
+        report = "".join(parts)
 
         # Вывод в консоль
-        print("\n" + "=" * 80)
-        print(report)
+        sys.stdout.writelines(("\n" + "=" * 80 + "\n", report, "\n"))
+        sys.stdout.flush()
 
         # Сохранение в файл
         if output_file:
@@ -1521,6 +1863,33 @@ class EnhancedPDFAccessibilityAnalyzer:
         return report
 
 
+# Анализатор и открытый PDF процесса-обработчика (см. analyze_parallel)
+_worker_analyzer = None
+_worker_pages = None
+
+
+def _init_page_worker(pdf_path: str, backend: str, chars_cache_dir: Optional[str],
+                      file_fingerprint: Optional[str], debug: bool):
+    """Готовит процесс пула: свой анализатор и свой дескриптор PDF"""
+    global _worker_analyzer, _worker_pages
+
+    _worker_analyzer = EnhancedPDFAccessibilityAnalyzer(pdf_path, debug=debug, backend=backend)
+    _worker_analyzer.chars_cache_dir = chars_cache_dir
+    _worker_analyzer.file_fingerprint = file_fingerprint
+    # Документ остается открытым до завершения процесса
+    _worker_pages = _worker_analyzer.get_document_pages(_worker_analyzer.open_document())
+
+
+def _analyze_one_page(page_num: int) -> Tuple[List[AccessibilityIssue], List[dict], Dict[str, int], List[dict]]:
+    """Анализирует одну страницу в процессе пула"""
+    _worker_analyzer.color_issues = []
+    _worker_analyzer.warnings = defaultdict(int)
+    _worker_analyzer.problematic_colors_found = []
+    page_issues = _worker_analyzer.analyze_page(page_num, _worker_pages[page_num - 1])
+    return (page_issues, _worker_analyzer.color_issues, dict(_worker_analyzer.warnings),
+            _worker_analyzer.problematic_colors_found)
+
+
 # ИСПОЛЬЗОВАНИЕ
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -1577,6 +1946,28 @@ if __name__ == "__main__":
         help='Режим создания скриншотов: none, area, full_page, smart'
     )
     
+    parser.add_argument(
+        '--backend',
+        type=str,
+        choices=['pdfplumber', 'fitz'],
+        default='pdfplumber',
+        help='Библиотека для извлечения символов: pdfplumber или fitz (PyMuPDF, быстрее на больших PDF; '
+             'результаты могут отличаться от pdfplumber - другие метрики шрифтов и набор символов)'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Не читать и не сохранять кэш символов страниц на диске'
+    )
+    
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=1,
+        help='Число процессов для параллельного анализа страниц (0 - по числу ядер)'
+    )
+    
     args = parser.parse_args()
     
     # Используем путь из аргументов или по умолчанию
@@ -1611,20 +2002,23 @@ if __name__ == "__main__":
         base_name = os.path.splitext(os.path.basename(pdf_path))[0]
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        if args.format == 'json':
-            args.output = f"reports/{base_name}_report_{timestamp}.json"
-        elif args.format == 'summary':
-            args.output = f"reports/{base_name}_summary_{timestamp}.txt"
-        elif args.format == 'statistics':
-            args.output = f"reports/{base_name}_statistics_{timestamp}.txt"
-        else:
-            args.output = f"reports/{base_name}_full_report_{timestamp}.txt"
+        # Суффикс и расширение имени файла для каждого формата
+        report_suffixes = {
+            'json': ('report', '.json'),
+            'summary': ('summary', '.txt'),
+            'statistics': ('statistics', '.txt'),
+            'full': ('full_report', '.txt'),
+        }
+        suffix, extension = report_suffixes[args.format]
+        args.output = f"reports/{base_name}_{suffix}_{timestamp}{extension}"
         
         # Создаем папку reports, если её нет
         os.makedirs('reports', exist_ok=True)
     
     # Создаем улучшенный анализатор
-    analyzer = EnhancedPDFAccessibilityAnalyzer(pdf_path)
+    analyzer = EnhancedPDFAccessibilityAnalyzer(pdf_path, backend=args.backend,
+                                                workers=args.workers or os.cpu_count() or 1,
+                                                use_cache=not args.no_cache)
 
     # Проводим анализ
     print("🚀 Запуск анализа доступности...")
@@ -1651,24 +2045,17 @@ if __name__ == "__main__":
 
         print(f"Общий объем проблемного текста: {summary['overall']['total_words']:,} слов")
 
-        # Подсчет уникальных текстов (нормализованных)
-        unique_texts = set()
-        for issue in analyzer.issues:
-            normalized = analyzer.remove_duplicate_chars(issue.text)
-            unique_texts.add(normalized[:100])  # Используем первые 100 символов
+        # Статистика по страницам уже посчитана для отчета - берем готовую
+        stats = analyzer.compute_all_stats()
+        page_words = stats['page_words']
+        page_issues = stats['page_places']
 
-        print(f"Уникальных текстовых фрагментов: {len(unique_texts):,}")
+        # Уникальные тексты (нормализованные, первые 100 символов)
+        print(f"Уникальных текстовых фрагментов: {len(stats['unique_texts']):,}")
 
         print("\nСамые проблемные страницы (по объему текста):")
-        # Группируем по страницам
-        page_words = defaultdict(int)
-        page_issues = defaultdict(int)
-
-        for issue in analyzer.issues:
-            page_words[issue.page] += analyzer.count_words(issue.text)
-            page_issues[issue.page] += 1
 
-        sorted_pages = sorted(page_words.items(), key=lambda x: x[1], reverse=True)[:5]
+        sorted_pages = heapq.nlargest(5, page_words.items(), key=itemgetter(1))
 
         for page_num, words in sorted_pages:
             issues_count = page_issues[page_num]
@@ -1680,15 +2067,18 @@ if __name__ == "__main__":
 
     if analyzer.color_issues:
         print("\n🎨 СВОДКА ПО ЦВЕТАМ (нормализованные тексты):")
-        color_summary = defaultdict(lambda: {'count': 0, 'unique_texts': set(), 'words': 0})
+        # Плоские счетчики по названию цвета
+        color_counts = Counter()
+        color_words = Counter()
+        color_texts = defaultdict(set)
         for issue in analyzer.color_issues:
             color = issue['color_name']
-            color_summary[color]['count'] += 1
+            color_counts[color] += 1
             text = issue.get('normalized_text', '') or issue.get('full_text', '') or issue.get('text_sample', '')
             if text:
-                color_summary[color]['unique_texts'].add(text[:100])
-                color_summary[color]['words'] += analyzer.count_words(text)
+                color_texts[color].add(text[:100])
+                color_words[color] += analyzer.count_words(text)
 
-        for color, stats in sorted(color_summary.items(), key=lambda x: x[1]['words'], reverse=True):
+        for color in sorted(color_counts, key=color_words.__getitem__, reverse=True):
             print(
-                f"  {color}: {stats['count']:,} случаев, {len(stats['unique_texts']):,} уникальных текстов, {stats['words']:,} слов")
\ No newline at end of file
+                f"  {color}: {color_counts[color]:,} случаев, {len(color_texts[color]):,} уникальных текстов, {color_words[color]:,} слов")
\ No newline at end of file